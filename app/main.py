@@ -1,19 +1,99 @@
-import os
+import asyncio
+import time
 from contextlib import asynccontextmanager
+from pathlib import Path
 
 import redis.asyncio as redis
-from fastapi import FastAPI, Depends, HTTPException, status
+from fastapi import FastAPI, HTTPException, status
+from fastapi.responses import ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi_limiter import FastAPILimiter
-from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy import text
-from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.persistence.connect import get_db
+from app.persistence.connect import sessionmanager
+from app.persistence.repository.auth import get_user_by_login
 from app.router import auth, receipts
 from app.service import messages
+from app.service.auth import auth_service
+from app.service.cache import cache
 from app.service.config import config
 from app.service.logger import logger
+from app.service.middleware import FastCORSMiddleware
+from app.service.utils import RECEIPT_FILES_QUEUE_SIZE, receipt_files_worker
+
+STATIC_DIR = "/app/static"
+HEALTH_CACHE_SECONDS = 1.0
+REDIS_INIT_BACKOFF_START = 0.5
+REDIS_INIT_BACKOFF_MAX = 30.0
+DB_WARMUP_CONNECTIONS = 5
+HEALTH_TRACEBACK_LOG_SECONDS = 5.0
+
+_last_ok_ts = 0.0
+_last_log = 0.0
+
+# Constant bodies are rendered once at import and the same response objects are reused
+_ROOT_RESPONSE = ORJSONResponse({"message": "This is a test task for Checkbox!"})
+_HEALTH_OK_RESPONSE = ORJSONResponse({"status": "Database connection is OK"})
+
+
+async def init_redis(app: FastAPI) -> None:
+    """
+    Connect to Redis and initialize FastAPILimiter, retrying with exponential backoff.
+
+    Runs as a background task so the application starts serving requests (including health
+    probes) without waiting for Redis. ``app.state.redis_ready`` is set once the limiter is ready.
+
+    :param app: The FastAPI application instance.
+    :type app: FastAPI
+    """
+    backoff = REDIS_INIT_BACKOFF_START
+    while True:
+        try:
+            r = redis.Redis(connection_pool=app.state.redis_pool)
+            await r.ping()
+            await FastAPILimiter.init(r)
+            app.state.redis_ready.set()
+            logger.info("Redis initialization complete. FastAPILimiter is ready.")
+            return
+        except Exception as exc:
+            logger.warning("Redis is not available yet (%s), retrying in %.1fs", exc, backoff)
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, REDIS_INIT_BACKOFF_MAX)
+
+
+async def _open_db_connection() -> None:
+    async with sessionmanager.engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+
+
+async def warm_up_db() -> None:
+    """
+    Pre-open database connections and compile the hot queries before traffic arrives.
+
+    ``DB_WARMUP_CONNECTIONS`` connections are opened concurrently so the pool holds them
+    afterwards, then the login lookup is executed with a dummy value inside a session that is
+    rolled back, which fills SQLAlchemy's compiled-statement cache. Failures are only logged,
+    the pool connects lazily as usual in that case.
+    """
+    try:
+        await asyncio.gather(*(_open_db_connection() for _ in range(DB_WARMUP_CONNECTIONS)))
+        async with sessionmanager.session() as session:
+            await get_user_by_login("", session)
+            await session.rollback()
+        logger.info("Database pool warmed up with %d connections.", DB_WARMUP_CONNECTIONS)
+    except Exception as exc:
+        logger.warning("Database warm-up skipped: %s", exc)
+
+
+def _log_task_failure(task: asyncio.Task) -> None:
+    """
+    Log the exception of a background task that stopped with an error.
+
+    :param task: The finished task.
+    :type task: asyncio.Task
+    """
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Background task %s failed", task.get_name(), exc_info=task.exception())
 
 
 @asynccontextmanager
@@ -21,9 +101,11 @@ async def lifespan(app: FastAPI):
     """
     Manage the application's lifespan events for startup and shutdown.
 
-    This context manager initializes external resources (such as Redis and FastAPILimiter)
-    during application startup and yields control to the application. Any exceptions during
-    initialization are logged and re-raised.
+    This context manager creates the Redis connection pool and starts its initialization
+    (together with FastAPILimiter), the database pool warm-up and the receipt files worker in the
+    background, initializes the JWT signer and the bcrypt backend, then yields control to the
+    application. The receipt files queue is created on ``app.state``, and a failure of the worker
+    is logged. On shutdown the background tasks are cancelled and the pool is disconnected.
 
     :param app: The FastAPI application instance.
     :type app: FastAPI
@@ -31,71 +113,105 @@ async def lifespan(app: FastAPI):
     """
     logger.info("Starting up application and initializing Redis...")
 
-    try:
-        r = await redis.Redis(
-            host=config.redis_host,
-            port=config.redis_port,
-            password=config.redis_password,
-            db=0,
-            encoding="utf-8",
-            decode_responses=True,
-        )
-        await FastAPILimiter.init(r)
-        logger.info("Redis initialization complete. FastAPILimiter is ready.")
-    except Exception as exc:
-        logger.exception("Unhandled exception during startup")
-        raise exc
+    app.state.redis_pool = redis.ConnectionPool(
+        host=config.redis_host,
+        port=config.redis_port,
+        password=config.redis_password,
+        db=0,
+        encoding="utf-8",
+        decode_responses=True,
+        max_connections=64,
+        socket_keepalive=True,
+        health_check_interval=30,
+    )
+    app.state.redis_ready = asyncio.Event()
+    redis_task = asyncio.create_task(init_redis(app))
+    db_warmup_task = asyncio.create_task(warm_up_db())
+    auth_service.warm_up()
+    # Created here rather than at import, so it belongs to the loop this lifespan runs on
+    app.state.receipt_files_queue = asyncio.Queue(maxsize=RECEIPT_FILES_QUEUE_SIZE)
+    receipt_files_task = asyncio.create_task(
+        receipt_files_worker(app.state.receipt_files_queue), name="receipt_files_worker"
+    )
+    receipt_files_task.add_done_callback(_log_task_failure)
+
+    if config.serve_static:
+        Path(STATIC_DIR).mkdir(parents=True, exist_ok=True)
 
     yield  # Hand over control to the application
 
+    redis_task.cancel()
+    db_warmup_task.cancel()
+    receipt_files_task.cancel()
+    await app.state.redis_pool.disconnect()
+    await cache.close()
+
 
 app = FastAPI(
     title="Test task",
     version="0.1.0",
     description="A FastAPI application demonstrating auth and receipts endpoints.",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
+    FastCORSMiddleware,
+    allow_origins=config.cors_origins,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    max_age=86400,
 )
 
 app.include_router(auth.router)
 app.include_router(receipts.router)
 
-# STATIC_DIR = "/app/static"
-# if not os.path.isdir(STATIC_DIR):
-#     os.makedirs(STATIC_DIR, exist_ok=True)
-#
-# app.mount("/static", StaticFiles(directory=STATIC_DIR), name="static")
+# Static assets are expected to be served by a reverse proxy in production; the mount is
+# only added when explicitly enabled, so it does not take part in routing otherwise.
+# The directory itself is created once in ``lifespan``.
+if config.serve_static:
+    app.mount("/static", StaticFiles(directory=STATIC_DIR, check_dir=False), name="static")
 
 
 @app.get("/health/db")
-async def check_db_connection(db: AsyncSession = Depends(get_db)) -> dict[str, str]:
+async def check_db_connection() -> ORJSONResponse:
     """
     Check the database connection by executing a simple SQL query.
 
-    :param db: The asynchronous database session dependency.
-    :type db: AsyncSession
-    :return: A dictionary containing the status of the database connection.
-    :rtype: dict[str, str]
+    The query runs on a bare engine connection (no ORM session or transaction bookkeeping),
+    directly through the asyncpg driver when it is in use, and a successful result is reused
+    for ``HEALTH_CACHE_SECONDS`` so frequent probes do not hit the database every time.
+
+    :return: A prebuilt JSON response containing the status of the database connection.
+    :rtype: ORJSONResponse
     :raises HTTPException: If the database cannot be reached or returns an unexpected result.
     """
+    global _last_ok_ts, _last_log
+
+    if time.monotonic() - _last_ok_ts < HEALTH_CACHE_SECONDS:
+        return _HEALTH_OK_RESPONSE
+
     logger.info("Checking database connection health...")
     try:
-        result = await db.execute(text("SELECT 1"))
-        value = result.scalar()
+        async with sessionmanager.engine.connect() as conn:
+            if conn.dialect.driver == "asyncpg":
+                # Skip SQLAlchemy's execute pipeline and ask the driver directly
+                raw = await conn.get_raw_connection()
+                value = await raw.driver_connection.fetchval("SELECT 1")
+            else:
+                value = (await conn.execute(text("SELECT 1"))).scalar()
         if value != 1:
             logger.error(messages.DB_INCORRECT_VALUE)
             raise Exception(messages.DB_INCORRECT_VALUE)
         logger.info("Database connection is OK.")
-        return {"status": "Database connection is OK"}
+        _last_ok_ts = time.monotonic()
+        return _HEALTH_OK_RESPONSE
     except Exception as exc:
-        logger.exception(exc)
+        # Full tracebacks are logged at most once per interval to avoid log storms during outages
+        if time.monotonic() - _last_log > HEALTH_TRACEBACK_LOG_SECONDS:
+            logger.exception("db health failed")
+            _last_log = time.monotonic()
+        else:
+            logger.warning("db health failed: %r", exc)
         raise HTTPException(
             status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
             detail=messages.DB_CANNOT_CONNECT
@@ -103,12 +219,12 @@ async def check_db_connection(db: AsyncSession = Depends(get_db)) -> dict[str, s
 
 
 @app.get("/")
-def read_root() -> dict[str, str]:
+def read_root() -> ORJSONResponse:
     """
     Root endpoint for testing service availability.
 
-    :return: A dictionary with a greeting message.
-    :rtype: dict[str, str]
+    :return: A prebuilt JSON response with a greeting message.
+    :rtype: ORJSONResponse
     """
     logger.info("Root endpoint accessed.")
-    return {"message": "This is a test task for Checkbox!"}
+    return _ROOT_RESPONSE
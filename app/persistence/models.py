@@ -1,19 +1,90 @@
 import enum
+import os
+import time
 import uuid
 from datetime import date
-from decimal import Decimal
+from decimal import Decimal, ROUND_HALF_UP
 from typing import List, Optional
 
 from sqlalchemy import (
+    BigInteger,
+    CheckConstraint,
+    Computed,
     Integer,
     String,
     ForeignKey,
-    Numeric,
     DateTime,
     Enum,
+    Index,
     func, UUID,
 )
 from sqlalchemy.orm import mapped_column, Mapped, relationship, DeclarativeBase
+from sqlalchemy.types import TypeDecorator
+
+
+def uuid7() -> uuid.UUID:
+    """
+    Generate a time-ordered UUID version 7 (RFC 9562).
+
+    The 48 most significant bits hold the Unix timestamp in milliseconds, so new primary keys
+    land on the rightmost B-tree page instead of random positions.
+
+    :return: A new UUIDv7.
+    :rtype: uuid.UUID
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+    rand_a = rand >> 68
+    rand_b = rand & ((1 << 62) - 1)
+    value = (
+        (timestamp_ms & ((1 << 48) - 1)) << 80
+        | 0x7 << 76
+        | rand_a << 64
+        | 0b10 << 62
+        | rand_b
+    )
+    return uuid.UUID(int=value)
+
+
+def to_cents(amount: Decimal) -> int:
+    """
+    Convert a monetary amount to an integer number of cents.
+
+    :param amount: The amount in currency units.
+    :type amount: Decimal
+    :return: The amount in cents, rounded half up.
+    :rtype: int
+    """
+    return int(Decimal(amount).scaleb(2).to_integral_value(rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    """
+    Convert an integer number of cents to a monetary amount with two decimal places.
+
+    :param cents: The amount in cents.
+    :type cents: int
+    :return: The amount in currency units.
+    :rtype: Decimal
+    """
+    return Decimal(cents).scaleb(-2)
+
+
+class Cents(TypeDecorator):
+    """
+    Monetary amount stored as BIGINT cents and exposed to Python as a two-place Decimal.
+
+    Integer columns decode much cheaper than NUMERIC in the driver; the conversion
+    happens only at the persistence boundary.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[Decimal], dialect) -> Optional[int]:
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value: Optional[int], dialect) -> Optional[Decimal]:
+        return None if value is None else from_cents(value)
 
 
 class Base(DeclarativeBase):
@@ -27,9 +98,9 @@ class PaymentType(enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     name: Mapped[str] = mapped_column(String(50))
-    login: Mapped[str] = mapped_column(String(250), nullable=False, unique=True)
+    login: Mapped[str] = mapped_column(String(250), nullable=False)
     password: Mapped[str] = mapped_column(String(255), nullable=False)
     created_at: Mapped[date] = mapped_column("created_at", DateTime, default=func.now())
     updated_at: Mapped[date] = mapped_column(
@@ -37,32 +108,66 @@ class User(Base):
     )
     refresh_token: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
 
-    receipts: Mapped[List["Receipt"]] = relationship("Receipt", back_populates="user")
+    # Collections must be eager-loaded explicitly (e.g. selectinload); implicit lazy loads raise
+    receipts: Mapped[List["Receipt"]] = relationship("Receipt", back_populates="user", lazy="raise")
+
+
+# Logins are looked up case-insensitively, so uniqueness is enforced on lower(login) as well
+Index("ix_users_login_lower", func.lower(User.login), unique=True)
 
 
 class Receipt(Base):
     __tablename__ = "receipts"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    __table_args__ = (
+        CheckConstraint("payment_type IN ('cash', 'card')", name="ck_receipts_payment_type"),
+    )
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
     user_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("users.id"), nullable=False)
-    payment_type: Mapped[PaymentType] = mapped_column(Enum(PaymentType), nullable=False)
-    total_amount: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
-    paid_amount: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=True)
-    created_at: Mapped[date] = mapped_column("created_at", DateTime, default=func.now())
+    # Stored as VARCHAR(4) + CHECK rather than a native PG enum; Python still gets PaymentType
+    payment_type: Mapped[PaymentType] = mapped_column(
+        Enum(PaymentType, native_enum=False, length=4), nullable=False
+    )
+    total_amount: Mapped[Decimal] = mapped_column(Cents, nullable=False)
+    paid_amount: Mapped[Decimal] = mapped_column(Cents, nullable=True)
+    # Change given back to the customer, maintained by the database
+    rest: Mapped[Decimal] = mapped_column(
+        Cents,
+        Computed(
+            "CASE WHEN payment_type = 'card' THEN 0 ELSE paid_amount - total_amount END",
+            persisted=True,
+        ),
+    )
+    # Server-side default: the value comes back in the INSERT's RETURNING clause
+    created_at: Mapped[date] = mapped_column("created_at", DateTime, server_default=func.now(), index=True)
     user: Mapped["User"] = relationship("User", back_populates="receipts")
 
     items: Mapped[List["ReceiptItem"]] = relationship(
         "ReceiptItem",
         back_populates="receipt",
-        cascade="all, delete-orphan"
+        cascade="all, delete-orphan",
+        lazy="raise"
     )
 
 
+# Serves "receipts of a user, newest first" without a sort node; the included columns let the
+# listing filters and projection be answered by an index-only scan
+Index(
+    "ix_receipts_user_created",
+    Receipt.user_id,
+    Receipt.created_at.desc(),
+    Receipt.id.desc(),
+    postgresql_include=["total_amount", "paid_amount", "payment_type", "rest"],
+)
+
+
 class ReceiptItem(Base):
     __tablename__ = "receipt_items"
-    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    receipt_id: Mapped[uuid.UUID] = mapped_column(UUID, ForeignKey("receipts.id"), nullable=False)
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid7)
+    receipt_id: Mapped[uuid.UUID] = mapped_column(
+        UUID, ForeignKey("receipts.id"), nullable=False, index=True
+    )
     product_name: Mapped[str] = mapped_column(String(250), nullable=False)
-    unit_price: Mapped[Decimal] = mapped_column(Numeric(10, 2), nullable=False)
+    unit_price: Mapped[Decimal] = mapped_column(Cents, nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, nullable=False)
 
     receipt: Mapped["Receipt"] = relationship("Receipt", back_populates="items")
@@ -1,11 +1,14 @@
 from typing import Optional
 
-from sqlalchemy import select, func
+from sqlalchemy import Row, bindparam, insert, select, update, func
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.attributes import set_committed_value
 
 from app.persistence.models import User
 from app.service.schemas import UserSchema
 
+_GET_USER_BY_LOGIN = select(User).where(func.lower(User.login) == bindparam("login"))
+
 
 async def get_user_by_login(login: str, db: AsyncSession) -> Optional[User]:
     """
@@ -18,34 +21,36 @@ async def get_user_by_login(login: str, db: AsyncSession) -> Optional[User]:
     :return: The user object if found, otherwise None.
     :rtype: Optional[User]
     """
-    sq = select(User).filter(func.lower(User.login) == func.lower(login))
-    result = await db.execute(sq)
+    result = await db.execute(_GET_USER_BY_LOGIN, {"login": login.lower()})
     user = result.scalar_one_or_none()
     return user
 
 
-async def create_user(body: UserSchema, db: AsyncSession) -> User:
+async def create_user(body: UserSchema, db: AsyncSession) -> Row:
     """
     Create a new user in the database based on the provided schema data.
 
+    Only the columns exposed by the API are returned, as a plain ``Row``, so no ORM instance is
+    hydrated or added to the identity map.
+
     :param body: The data required to create a new user, including fields like login and password.
     :type body: UserSchema
     :param db: The async database session dependency.
     :type db: AsyncSession
-    :return: The newly created user object with a database-generated ID.
-    :rtype: User
+    :return: The ``(id, login)`` row of the newly created user, from INSERT ... RETURNING.
+    :rtype: Row
     """
-    new_user = User(**body.model_dump())
-    db.add(new_user)
-
+    stmt = insert(User).values(
+        name=body.name, login=body.login, password=body.password
+    ).returning(User.id, User.login)
+    new_user = (await db.execute(stmt)).one()
     await db.commit()
-    await db.refresh(new_user)
     return new_user
 
 
 async def update_token(user: User, token: str | None, db: AsyncSession) -> None:
     """
-    Update the user's refresh token in the database.
+    Update the user's refresh token in the database with a single UPDATE statement.
 
     :param user: The user whose refresh token needs to be updated.
     :type user: User
@@ -56,5 +61,61 @@ async def update_token(user: User, token: str | None, db: AsyncSession) -> None:
     :return: None
     :rtype: None
     """
-    user.refresh_token = token
+    await db.execute(
+        update(User)
+        .where(User.id == user.id)
+        .values(refresh_token=token)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    # Keep the loaded instance in sync without marking it dirty (no ORM flush involved)
+    set_committed_value(user, "refresh_token", token)
+
+
+async def update_token_by_login(login: str, token: str | None, db: AsyncSession) -> None:
+    """
+    Update the refresh token of the user with the given login, without loading the user first.
+
+    :param login: The user's login, matched case-insensitively.
+    :type login: str
+    :param token: The new refresh token, or None to clear it.
+    :type token: str | None
+    :param db: The async database session dependency.
+    :type db: AsyncSession
+    :return: None
+    :rtype: None
+    """
+    await db.execute(
+        update(User)
+        .where(func.lower(User.login) == login.lower())
+        .values(refresh_token=token)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+
+
+async def rotate_refresh_token(login: str, current_token: str, new_token: str, db: AsyncSession) -> bool:
+    """
+    Replace the user's refresh token only if it still equals ``current_token`` (compare-and-swap).
+
+    Validates and rotates the token with a single UPDATE, without loading the user first.
+
+    :param login: The user's login, matched case-insensitively.
+    :type login: str
+    :param current_token: The refresh token presented by the client.
+    :type current_token: str
+    :param new_token: The new refresh token.
+    :type new_token: str
+    :param db: The async database session dependency.
+    :type db: AsyncSession
+    :return: True if the token was rotated, False if the stored token did not match.
+    :rtype: bool
+    """
+    result = await db.execute(
+        update(User)
+        .where(func.lower(User.login) == login.lower(), User.refresh_token == current_token)
+        .values(refresh_token=new_token)
+        .execution_options(synchronize_session=False)
+    )
     await db.commit()
+    return result.rowcount > 0
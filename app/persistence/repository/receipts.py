@@ -1,17 +1,165 @@
 from datetime import datetime
 from decimal import Decimal
-from typing import List, Optional
+from typing import Any, List, Optional
 from uuid import UUID
 
 from fastapi import HTTPException
-from sqlalchemy import select
+from sqlalchemy import BigInteger, Integer, String, bindparam, insert, lambda_stmt, select, text, tuple_
+from sqlalchemy.dialects.postgresql import ARRAY, UUID as PG_UUID
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import contains_eager, load_only, raiseload, selectinload
 
-from app.persistence.models import User, Receipt, PaymentType, ReceiptItem
+from app.persistence.models import User, Receipt, PaymentType, ReceiptItem, Cents, from_cents, to_cents, uuid7
 from app.service import messages
+from app.service.cache import cache
 from app.service.schemas import ReceiptCreateSchema
 
+COPY_THRESHOLD = 100
+RECEIPTS_YIELD_PER = 50
+# Plain dict lookup instead of going through the Enum metaclass call on every request
+_PT = {member.value: member for member in PaymentType}
+RECEIPT_CACHE_TTL = 3600
+# Bumped whenever the cached payload layout changes, so stale entries are never decoded
+RECEIPT_CACHE_VERSION = 2
+_COPY_COLUMNS = ["id", "receipt_id", "product_name", "unit_price", "quantity"]
+
+# Receipt and items in one statement (PostgreSQL): the items are unnested from array parameters
+_CREATE_RECEIPT_WITH_ITEMS = select(Receipt).from_statement(
+    text(
+        """
+        WITH r AS (
+            INSERT INTO receipts (id, user_id, payment_type, total_amount, paid_amount)
+            VALUES (:id, :user_id, :payment_type, :total_amount, :paid_amount)
+            RETURNING id, user_id, payment_type, total_amount, paid_amount, rest, created_at
+        ), i AS (
+            INSERT INTO receipt_items (id, receipt_id, product_name, unit_price, quantity)
+            SELECT item.id, r.id, item.product_name, item.unit_price, item.quantity
+            FROM r, unnest(
+                CAST(:item_ids AS uuid[]),
+                CAST(:names AS varchar[]),
+                CAST(:prices AS bigint[]),
+                CAST(:quantities AS integer[])
+            ) AS item(id, product_name, unit_price, quantity)
+        )
+        SELECT id, user_id, payment_type, total_amount, paid_amount, rest, created_at FROM r
+        """
+    )
+    .bindparams(
+        bindparam("total_amount", type_=Cents()),
+        bindparam("paid_amount", type_=Cents()),
+        bindparam("item_ids", type_=ARRAY(PG_UUID(as_uuid=True))),
+        bindparam("names", type_=ARRAY(String())),
+        bindparam("prices", type_=ARRAY(BigInteger())),
+        bindparam("quantities", type_=ARRAY(Integer())),
+    )
+    .columns(*Receipt.__table__.c)
+)
+
+# Single-receipt fetches load the items in the same round-trip with a LEFT JOIN.
+# raiseload("*") makes any relationship that is not loaded explicitly raise instead of lazy loading.
+# Only the item columns used by responses and receipt texts are selected.
+_ITEMS_EAGER = contains_eager(Receipt.items).load_only(
+    ReceiptItem.product_name, ReceiptItem.unit_price, ReceiptItem.quantity
+)
+_FETCH_RECEIPT_BY_ID = (
+    select(Receipt)
+    .outerjoin(Receipt.items)
+    .options(_ITEMS_EAGER, raiseload("*"))
+    .where(
+        Receipt.id == bindparam("receipt_id"),
+        Receipt.user_id == bindparam("user_id")
+    )
+)
+_FETCH_RECEIPT_BY_ID_PUBLIC = (
+    select(Receipt)
+    .outerjoin(Receipt.items)
+    .options(_ITEMS_EAGER, raiseload("*"))
+    .where(Receipt.id == bindparam("receipt_id"))
+)
+
+
+def _receipt_cache_key(receipt_id: UUID) -> str:
+    return f"receipt:v{RECEIPT_CACHE_VERSION}:{receipt_id}"
+
+
+def _receipt_to_cache(receipt: Receipt, items: List[tuple[str, Decimal, int]]) -> dict[str, Any]:
+    """
+    Build the cached JSON payload of a receipt.
+
+    :param receipt: The receipt with its columns loaded.
+    :type receipt: Receipt
+    :param items: The ``(product_name, unit_price, quantity)`` tuples of the receipt's items.
+    :type items: List[tuple[str, Decimal, int]]
+    :return: A JSON-serializable payload.
+    :rtype: dict[str, Any]
+    """
+    return {
+        "id": receipt.id,
+        "user_id": receipt.user_id,
+        "payment_type": receipt.payment_type.value,
+        "total_amount": receipt.total_amount,
+        "paid_amount": receipt.paid_amount,
+        "rest": receipt.rest,
+        "created_at": receipt.created_at,
+        "items": items,
+    }
+
+
+def _receipt_from_cache(data: dict[str, Any]) -> Receipt:
+    """
+    Rebuild a transient (session-less) receipt with its items from a cached payload.
+
+    :param data: The payload produced by ``_receipt_to_cache`` and decoded from JSON.
+    :type data: dict[str, Any]
+    :return: The receipt, with ``items`` populated.
+    :rtype: Receipt
+    """
+    return Receipt(
+        id=UUID(data["id"]),
+        user_id=UUID(data["user_id"]),
+        payment_type=_PT[data["payment_type"]],
+        total_amount=Decimal(data["total_amount"]),
+        paid_amount=None if data["paid_amount"] is None else Decimal(data["paid_amount"]),
+        rest=Decimal(data["rest"]),
+        created_at=datetime.fromisoformat(data["created_at"]),
+        items=[
+            ReceiptItem(product_name=name, unit_price=Decimal(price), quantity=quantity)
+            for name, price, quantity in data["items"]
+        ],
+    )
+
+
+async def _fetch_receipt_cached(
+    db: AsyncSession,
+    stmt,
+    params: dict[str, Any],
+    receipt_id: UUID
+) -> Optional[Receipt]:
+    """
+    Read-through cache for single-receipt lookups; receipts are immutable once created.
+
+    :param db: The async database session dependency.
+    :type db: AsyncSession
+    :param stmt: The SELECT statement run on a cache miss.
+    :param params: The statement parameters.
+    :type params: dict[str, Any]
+    :param receipt_id: The unique identifier of the receipt.
+    :type receipt_id: UUID
+    :return: The receipt if found, otherwise None.
+    :rtype: Optional[Receipt]
+    """
+    key = _receipt_cache_key(receipt_id)
+    cached = await cache.get(key)
+    if cached is not None:
+        return _receipt_from_cache(cached)
+
+    result = await db.execute(stmt, params)
+    receipt = result.unique().scalar_one_or_none()
+    if receipt is not None:
+        items = [(item.product_name, item.unit_price, item.quantity) for item in receipt.items]
+        await cache.set(key, _receipt_to_cache(receipt, items), ex=RECEIPT_CACHE_TTL)
+    return receipt
+
 
 async def create_receipt_in_db(
     receipt_request: ReceiptCreateSchema,
@@ -20,7 +168,11 @@ async def create_receipt_in_db(
     db: AsyncSession
 ) -> Receipt:
     """
-    Create a new receipt record in the database.
+    Create a new receipt record, with its items, in the database.
+
+    On PostgreSQL the receipt and its items are inserted by one CTE statement; receipts with more
+    than ``COPY_THRESHOLD`` items write the items with COPY instead. Other databases use the ORM
+    and a bulk INSERT of the items.
 
     :param receipt_request: The data schema for creating a receipt.
     :type receipt_request: ReceiptCreateSchema
@@ -35,33 +187,93 @@ async def create_receipt_in_db(
     :raises SQLAlchemyError: If an error occurs while committing the transaction to the database.
     :raises Exception: For any unexpected errors that might occur during the creation process.
     """
-    new_receipt = Receipt(
-        user_id=current_user.id,
-        payment_type=PaymentType(receipt_request.payment.type),
-        total_amount=total_sum,
-        paid_amount=(
-            receipt_request.payment.amount
-            if receipt_request.payment.type == "cash"
-            else None
-        )
-    )
-    db.add(new_receipt)
-    await db.flush()
-
-    for product in receipt_request.products:
-        new_item = ReceiptItem(
-            receipt_id=new_receipt.id,
-            product_name=product.name,
-            unit_price=product.price,
-            quantity=product.quantity
+    # Rounded to whole cents as the database stores them, so the cached copy below matches it
+    total_sum = from_cents(to_cents(total_sum))
+    paid_amount = receipt_request.payment.amount if receipt_request.payment.type == "cash" else None
+    if paid_amount is not None:
+        paid_amount = from_cents(to_cents(paid_amount))
+    products = receipt_request.products
+
+    if db.bind.dialect.driver == "asyncpg" and len(products) <= COPY_THRESHOLD:
+        # Receipt and items are written by a single statement, in one round-trip
+        result = await db.execute(_CREATE_RECEIPT_WITH_ITEMS, {
+            "id": uuid7(),
+            "user_id": current_user.id,
+            "payment_type": receipt_request.payment.type,
+            "total_amount": total_sum,
+            "paid_amount": paid_amount,
+            "item_ids": [uuid7() for _ in products],
+            "names": [product.name for product in products],
+            "prices": [to_cents(product.price) for product in products],
+            "quantities": [product.quantity for product in products],
+        })
+        new_receipt = result.scalar_one()
+    else:
+        new_receipt = Receipt(
+            user_id=current_user.id,
+            payment_type=_PT[receipt_request.payment.type],
+            total_amount=total_sum,
+            paid_amount=paid_amount,
         )
-        db.add(new_item)
+        db.add(new_receipt)
+        await db.flush()
 
+        if db.bind.dialect.driver == "asyncpg":
+            # Very large receipts go through COPY, which is much cheaper than a huge INSERT
+            await _copy_receipt_items(new_receipt.id, receipt_request, db)
+        elif products:
+            # A single executemany INSERT instead of one ORM flush per item
+            await db.execute(insert(ReceiptItem), [
+                {
+                    "receipt_id": new_receipt.id,
+                    "product_name": product.name,
+                    "unit_price": product.price,
+                    "quantity": product.quantity,
+                }
+                for product in products
+            ])
+
+    # created_at and rest are server-generated and were already loaded by the INSERT ... RETURNING
     await db.commit()
-    await db.refresh(new_receipt)
+
+    # Pre-populate the cache, the receipt is most likely to be read right after creation
+    items = [(product.name, from_cents(to_cents(product.price)), product.quantity) for product in products]
+    await cache.set(
+        _receipt_cache_key(new_receipt.id), _receipt_to_cache(new_receipt, items), ex=RECEIPT_CACHE_TTL
+    )
     return new_receipt
 
 
+async def _copy_receipt_items(
+    receipt_id: UUID,
+    receipt_request: ReceiptCreateSchema,
+    db: AsyncSession
+) -> None:
+    """
+    Write the receipt items with PostgreSQL COPY through the session's asyncpg connection.
+
+    COPY bypasses SQLAlchemy, so column defaults and type conversions are applied here:
+    ids are generated and prices are stored in cents.
+
+    :param receipt_id: The ID of the (already flushed) receipt the items belong to.
+    :type receipt_id: UUID
+    :param receipt_request: The data schema for creating a receipt.
+    :type receipt_request: ReceiptCreateSchema
+    :param db: The async database session dependency.
+    :type db: AsyncSession
+    """
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        ReceiptItem.__tablename__,
+        records=[
+            (uuid7(), receipt_id, product.name, to_cents(product.price), product.quantity)
+            for product in receipt_request.products
+        ],
+        columns=_COPY_COLUMNS,
+    )
+
+
 async def fetch_receipts(
     db: AsyncSession,
     user_id: UUID,
@@ -70,7 +282,7 @@ async def fetch_receipts(
     min_total: Optional[Decimal] = None,
     payment_type: Optional[str] = None,
     limit: int = 10,
-    offset: int = 0,
+    after: Optional[tuple[datetime, UUID]] = None,
 ) -> List[Receipt]:
     """
     Retrieve a list of receipts matching various filter criteria.
@@ -89,28 +301,54 @@ async def fetch_receipts(
     :type payment_type: Optional[str]
     :param limit: The maximum number of receipts to return.
     :type limit: int
-    :param offset: The number of receipts to skip before starting to collect the result set.
-    :type offset: int
-    :return: A list of receipts matching the provided filters.
+    :param after: The ``(created_at, id)`` of the last receipt of the previous page; only receipts
+                  after it in the listing order (newest first) are returned.
+    :type after: Optional[tuple[datetime, UUID]]
+    :return: A list of receipts matching the provided filters, newest first.
     :rtype: List[Receipt]
     :raises SQLAlchemyError: If a database error occurs during the query execution.
     :raises Exception: For any unexpected errors that might occur.
     """
-    query = select(Receipt).options(selectinload(Receipt.items)).where(
-        Receipt.user_id == user_id
+    # lambda_stmt caches the built and compiled statement per combination of filters, the
+    # values themselves are extracted from the closures as bound parameters.
+    # Only the columns rendered in the listing are loaded (user_id is already known).
+    query = lambda_stmt(
+        lambda: select(Receipt).options(
+            load_only(
+                Receipt.payment_type,
+                Receipt.total_amount,
+                Receipt.paid_amount,
+                Receipt.rest,
+                Receipt.created_at,
+            ),
+            selectinload(Receipt.items).load_only(
+                ReceiptItem.product_name, ReceiptItem.unit_price, ReceiptItem.quantity
+            ),
+            raiseload("*"),
+        ).where(Receipt.user_id == user_id)
     )
     if start_date:
-        query = query.where(Receipt.created_at >= start_date)
+        query += lambda s: s.where(Receipt.created_at >= start_date)
     if end_date:
-        query = query.where(Receipt.created_at <= end_date)
+        query += lambda s: s.where(Receipt.created_at <= end_date)
     if min_total:
-        query = query.where(Receipt.total_amount >= min_total)
+        query += lambda s: s.where(Receipt.total_amount >= min_total)
     if payment_type:
-        query = query.where(Receipt.payment_type == PaymentType(payment_type))
+        payment_type_member = _PT[payment_type]
+        query += lambda s: s.where(Receipt.payment_type == payment_type_member)
 
-    query = query.offset(offset).limit(limit)
-    result = await db.execute(query)
-    return result.scalars().all()
+    if after:
+        # Keyset pagination: seek past the previous page instead of scanning OFFSET rows
+        after_created_at, after_id = after
+        query += lambda s: s.where(
+            tuple_(Receipt.created_at, Receipt.id) < tuple_(after_created_at, after_id)
+        )
+
+    # Matches the (user_id, created_at DESC, id DESC) index, so the scan stops after the page
+    query += lambda s: s.order_by(Receipt.created_at.desc(), Receipt.id.desc()).limit(limit)
+    # Stream the page in batches (items are selectin-loaded per batch) to cap peak memory
+    result = await db.stream_scalars(query, execution_options={"yield_per": RECEIPTS_YIELD_PER})
+    return [receipt async for receipt in result]
 
 
 async def fetch_receipt_by_id(
@@ -119,7 +357,7 @@ async def fetch_receipt_by_id(
     receipt_id: UUID
 ) -> Optional[Receipt]:
     """
-    Retrieve a specific receipt by its ID for a given user.
+    Retrieve a specific receipt by its ID for a given user, through the Redis cache.
 
     :param db: The async database session dependency.
     :type db: AsyncSession
@@ -132,17 +370,18 @@ async def fetch_receipt_by_id(
     :raises SQLAlchemyError: If a database error occurs during the query execution.
     :raises Exception: For any unexpected errors that might occur.
     """
-    query = select(Receipt).options(selectinload(Receipt.items)).where(
-        Receipt.id == receipt_id,
-        Receipt.user_id == user_id
+    receipt = await _fetch_receipt_cached(
+        db, _FETCH_RECEIPT_BY_ID, {"receipt_id": receipt_id, "user_id": user_id}, receipt_id
     )
-    result = await db.execute(query)
-    return result.scalar_one_or_none()
+    # Cache hits are not filtered by owner in SQL
+    if receipt is not None and receipt.user_id != user_id:
+        return None
+    return receipt
 
 
 async def fetch_receipt_by_id_public(db: AsyncSession, receipt_id: UUID) -> Receipt:
     """
-    Retrieve a public receipt by its unique ID (regardless of user).
+    Retrieve a public receipt by its unique ID (regardless of user), through the Redis cache.
 
     :param db: The async database session dependency.
     :type db: AsyncSession
@@ -154,11 +393,9 @@ async def fetch_receipt_by_id_public(db: AsyncSession, receipt_id: UUID) -> Rece
     :raises SQLAlchemyError: If a database error occurs during the query execution.
     :raises Exception: For any unexpected errors that might occur.
     """
-    query = select(Receipt).options(selectinload(Receipt.items)).where(
-        Receipt.id == receipt_id
+    receipt = await _fetch_receipt_cached(
+        db, _FETCH_RECEIPT_BY_ID_PUBLIC, {"receipt_id": receipt_id}, receipt_id
     )
-    result = await db.execute(query)
-    receipt = result.scalar_one_or_none()
     if not receipt:
         raise HTTPException(status_code=404, detail=messages.RECEIPT_NOT_EXIST)
     return receipt
@@ -13,7 +13,13 @@ from fastapi.security import (
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.persistence.connect import get_db
-from app.persistence.repository.auth import get_user_by_login, create_user, update_token
+from app.persistence.repository.auth import (
+    get_user_by_login,
+    create_user,
+    update_token,
+    update_token_by_login,
+    rotate_refresh_token,
+)
 from app.service import messages
 from app.service.auth import auth_service
 from app.service.schemas import UserResponseSchema, UserSchema, TokenModel
@@ -44,7 +50,7 @@ async def signup(
             status_code=status.HTTP_409_CONFLICT,
             detail=messages.ACCOUNT_EXIST
         )
-    body.password = auth_service.get_password_hash(body.password)
+    body.password = await auth_service.get_password_hash(body.password)
     new_user = await create_user(body, db)
     return new_user
 
@@ -71,7 +77,7 @@ async def login(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=messages.INVALID_LOGIN
         )
-    if not auth_service.verify_password(body.password, user.password):
+    if not await auth_service.verify_password(body.password, user.password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=messages.BAD_PASSWORD
@@ -106,19 +112,19 @@ async def refresh_token(
     """
     token = credentials.credentials
     login = await auth_service.decode_refresh_token(token)
-    user = await get_user_by_login(login, db)
 
-    if user.refresh_token != token:
-        await update_token(user, None, db)
+    access_token = await auth_service.create_access_token(data={"sub": login})
+    refresh_token = await auth_service.create_refresh_token(data={"sub": login})
+
+    # The database check and the rotation are a single compare-and-swap UPDATE; a token that
+    # matches no row (reused or revoked) revokes the session
+    if not await rotate_refresh_token(login, token, refresh_token, db):
+        await update_token_by_login(login, None, db)
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail=messages.BAD_REFRESH_TOKEN
         )
 
-    access_token = await auth_service.create_access_token(data={"sub": login})
-    refresh_token = await auth_service.create_refresh_token(data={"sub": login})
-    await update_token(user, refresh_token, db)
-
     return {
         "access_token": access_token,
         "refresh_token": refresh_token,
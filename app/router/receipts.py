@@ -1,29 +1,83 @@
+import asyncio
+import hashlib
 import os
+import stat
+import zlib
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional, List
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, HTTPException
+import orjson
+from fastapi import APIRouter, Depends, Header, Query, HTTPException, Request, Response
 from fastapi.responses import FileResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from starlette import status
 
 from app.persistence.connect import get_db
-from app.persistence.models import User
+from app.persistence.models import Receipt, User
 from app.persistence.repository.receipts import create_receipt_in_db, fetch_receipts, fetch_receipt_by_id
 from app.service import messages
 from app.service.auth import auth_service
+from app.service.cache import cache, cached_response
 from app.service.logger import logger
 from app.service.schemas import ReceiptResponse, ReceiptCreateSchema, ReceiptResponseOut
-from app.service.utils import calculate_receipt_details, prepare_receipt_files, build_receipt_response_out
+from app.service.utils import (
+    DEFAULT_LINE_LENGTH,
+    MAX_LINE_LENGTH,
+    NEXT_CURSOR_HEADER,
+    DecimalORJSONResponse,
+    build_receipt_response_out,
+    calculate_receipt_details,
+    decode_cursor,
+    encode_cursor,
+    enqueue_receipt_files,
+    prepare_receipt_files,
+    receipt_file_paths,
+    render_receipt_text,
+)
+
+RECEIPTS_LIST_CACHE_PREFIX = "receipts:list"
+RECEIPTS_LIST_CACHE_TTL = 30
+# Per-user counter that is part of every listing key; bumping it invalidates all of the user's listings
+RECEIPTS_LIST_GENERATION_PREFIX = "receipts:list:gen"
+# Pages with at least this many receipts are rendered in a worker thread
+LIST_RENDER_THREAD_THRESHOLD = 50
+# Receipts never change once created, so their public files can be cached by clients for good
+PUBLIC_FILE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Public file types and their media types; one dict lookup both validates and resolves the type
+_FILE_MEDIA_TYPES = {"txt": "text/plain", "qr": "image/png"}
+
+# Endpoints that return models (e.g. create) are rendered with orjson as well
+router = APIRouter(prefix="/receipt", tags=["Receipt"], default_response_class=DecimalORJSONResponse)
+
+
+async def _receipts_list_cache_key(
+    current_user: User,
+    start_date: Optional[datetime],
+    end_date: Optional[datetime],
+    min_total: Optional[Decimal],
+    payment_type: Optional[str],
+    limit: int,
+    cursor: Optional[str],
+    **_
+) -> str:
+    """
+    Build the per-user cache key of a receipt listing from its filters and the user's generation.
 
-router = APIRouter(prefix="/receipt", tags=["Receipt"])
+    :return: ``"<user_id>:<generation>:<digest of the filters>"``; a new generation makes every
+             listing cached under the previous one unreachable.
+    :rtype: str
+    """
+    generation = await cache.get(f"{RECEIPTS_LIST_GENERATION_PREFIX}:{current_user.id}") or 0
+    filters = orjson.dumps([start_date, end_date, min_total, payment_type, limit, cursor], default=str)
+    return f"{current_user.id}:{generation}:{hashlib.sha1(filters).hexdigest()}"
 
 
 @router.post("/create", response_model=ReceiptResponse, status_code=status.HTTP_200_OK)
 async def create_receipt(
     receipt_request: ReceiptCreateSchema,
+    request: Request,
     current_user: User = Depends(auth_service.get_current_user),
     db: AsyncSession = Depends(get_db)
 ):
@@ -32,6 +86,8 @@ async def create_receipt(
 
     :param receipt_request: The data required to create a new receipt.
     :type receipt_request: ReceiptCreateSchema
+    :param request: The incoming request, used to reach the receipt files queue on ``app.state``.
+    :type request: Request
     :param current_user: The current authenticated user.
     :type current_user: User
     :param db: The database session dependency.
@@ -47,6 +103,10 @@ async def create_receipt(
     try:
         calculated_products, total_sum, rest = calculate_receipt_details(receipt_request)
         new_receipt = await create_receipt_in_db(receipt_request, current_user, total_sum, db)
+        # Cached listings of this user no longer include every receipt; a single INCR replaces them
+        await cache.incr(f"{RECEIPTS_LIST_GENERATION_PREFIX}:{current_user.id}")
+        # The public files are generated in the background, ahead of the first view
+        enqueue_receipt_files(request.app.state.receipt_files_queue, new_receipt.id)
 
         response_data = ReceiptResponse(
             id=new_receipt.id,
@@ -59,7 +119,7 @@ async def create_receipt(
         return response_data
 
     except HTTPException as http_err:
-        logger.exception("HTTP error while creating receipt: %s", http_err)
+        logger.warning("HTTP %s while creating receipt: %s", http_err.status_code, http_err.detail)
         raise http_err
 
     except Exception as err:
@@ -70,7 +130,34 @@ async def create_receipt(
         ) from err
 
 
-@router.get("/get-with-filters", response_model=List[ReceiptResponseOut], status_code=status.HTTP_200_OK)
+def _render_receipts_page(receipts: List[Receipt]) -> DecimalORJSONResponse:
+    """
+    Build the JSON response of a page of receipts.
+
+    Only reads already loaded attributes, so it can run in a worker thread.
+
+    :param receipts: The receipts of the page, with their items loaded.
+    :type receipts: List[Receipt]
+    :return: A JSON list of receipts in the ReceiptResponseOut format.
+    :rtype: DecimalORJSONResponse
+    """
+    return DecimalORJSONResponse([build_receipt_response_out(receipt) for receipt in receipts])
+
+
+# The handlers render plain dicts with orjson themselves: response_model=None skips FastAPI's
+# validation and encoding of the output, while ``responses`` keeps the schema in the OpenAPI docs
+@router.get(
+    "/get-with-filters",
+    response_model=None,
+    responses={200: {"model": List[ReceiptResponseOut]}},
+    status_code=status.HTTP_200_OK,
+)
+@cached_response(
+    prefix=RECEIPTS_LIST_CACHE_PREFIX,
+    expire=RECEIPTS_LIST_CACHE_TTL,
+    key_builder=_receipts_list_cache_key,
+    headers=(NEXT_CURSOR_HEADER,),
+)
 async def list_receipts(
     start_date: Optional[datetime] = Query(
         None, description="Filter receipts created from this date (inclusive)"
@@ -85,12 +172,19 @@ async def list_receipts(
         None, description="Filter receipts by payment type (cash or card)"
     ),
     limit: int = Query(10, gt=0, description="Number of receipts per page"),
-    offset: int = Query(0, ge=0, description="Number of receipts to skip"),
+    cursor: Optional[str] = Query(
+        None, description=f"Cursor of the next page, taken from the {NEXT_CURSOR_HEADER} header"
+    ),
     current_user: User = Depends(auth_service.get_current_user),
     db: AsyncSession = Depends(get_db)
-):
+) -> DecimalORJSONResponse:
     """
-    List receipts belonging to the current user, with optional filters.
+    List receipts belonging to the current user, newest first, with optional filters.
+
+    Pagination is keyset-based: when the page is full, the cursor of the next page is returned in
+    the ``X-Next-Cursor`` response header and is passed back as the ``cursor`` query parameter.
+    Responses are cached per user and filters for ``RECEIPTS_LIST_CACHE_TTL`` seconds; creating
+    a receipt invalidates the user's cached listings.
 
     :param start_date: Filter for receipts created on or after this date (inclusive).
     :type start_date: Optional[datetime]
@@ -102,18 +196,19 @@ async def list_receipts(
     :type payment_type: Optional[str]
     :param limit: Maximum number of receipts to return.
     :type limit: int
-    :param offset: Number of receipts to skip for pagination.
-    :type offset: int
+    :param cursor: The cursor of the page to return, None for the first page.
+    :type cursor: Optional[str]
     :param current_user: The current authenticated user.
     :type current_user: User
     :param db: The database session dependency.
     :type db: AsyncSession
-    :return: A list of receipts matching the given filters.
-    :rtype: List[ReceiptResponseOut]
-    :raises HTTPException: If database or validation errors occur.
+    :return: A JSON list of receipts (in the ReceiptResponseOut format) matching the given filters.
+    :rtype: DecimalORJSONResponse
+    :raises HTTPException: If the cursor is invalid or if database or validation errors occur.
     :raises Exception: For any unexpected error during receipt retrieval.
     """
     try:
+        after = decode_cursor(cursor) if cursor else None
         receipts = await fetch_receipts(
             db=db,
             user_id=current_user.id,
@@ -122,12 +217,23 @@ async def list_receipts(
             min_total=min_total,
             payment_type=payment_type,
             limit=limit,
-            offset=offset
+            after=after
         )
-        return [build_receipt_response_out(r) for r in receipts]
+        if not receipts:
+            return DecimalORJSONResponse([])
+
+        if len(receipts) >= LIST_RENDER_THREAD_THRESHOLD:
+            # Large pages would hold the event loop for the whole render, do it off the loop
+            response = await asyncio.to_thread(_render_receipts_page, receipts)
+        else:
+            response = _render_receipts_page(receipts)
+        if len(receipts) == limit:
+            last = receipts[-1]
+            response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.created_at, last.id)
+        return response
 
     except HTTPException as http_err:
-        logger.exception("HTTP error while listing receipts: %s", http_err)
+        logger.warning("HTTP %s while listing receipts: %s", http_err.status_code, http_err.detail)
         raise http_err
 
     except Exception as err:
@@ -138,12 +244,17 @@ async def list_receipts(
         ) from err
 
 
-@router.get("/get-by-id/{receipt_id}", response_model=ReceiptResponseOut, status_code=status.HTTP_200_OK)
+@router.get(
+    "/get-by-id/{receipt_id}",
+    response_model=None,
+    responses={200: {"model": ReceiptResponseOut}},
+    status_code=status.HTTP_200_OK,
+)
 async def get_receipt(
     receipt_id: UUID,
     current_user: User = Depends(auth_service.get_current_user),
     db: AsyncSession = Depends(get_db)
-):
+) -> DecimalORJSONResponse:
     """
     Retrieve a specific receipt by its unique ID.
 
@@ -153,8 +264,8 @@ async def get_receipt(
     :type current_user: User
     :param db: The database session dependency.
     :type db: AsyncSession
-    :return: The details of the requested receipt.
-    :rtype: ReceiptResponseOut
+    :return: The details of the requested receipt, in the ReceiptResponseOut format.
+    :rtype: DecimalORJSONResponse
     :raises HTTPException: If the receipt is not found or if database errors occur.
     :raises Exception: For any unexpected error during receipt retrieval.
     """
@@ -163,10 +274,10 @@ async def get_receipt(
         if not receipt:
             raise HTTPException(status_code=404, detail=messages.RECEIPT_NOT_EXIST)
 
-        return build_receipt_response_out(receipt)
+        return DecimalORJSONResponse(build_receipt_response_out(receipt))
 
     except HTTPException as http_err:
-        logger.exception("HTTP error while fetching receipt by ID: %s", http_err)
+        logger.warning("HTTP %s while fetching receipt by ID: %s", http_err.status_code, http_err.detail)
         raise http_err
 
     except Exception as err:
@@ -177,17 +288,55 @@ async def get_receipt(
         ) from err
 
 
+def _regular_file_stat(path: str) -> Optional[os.stat_result]:
+    """
+    Stat a file once, for both the existence check and the response headers.
+
+    :param path: The file path.
+    :type path: str
+    :return: The stat result, or None if the path does not exist or is not a regular file.
+    :rtype: Optional[os.stat_result]
+    """
+    try:
+        stat_result = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat_result if stat.S_ISREG(stat_result.st_mode) else None
+
+
+def _not_modified(etag: str) -> Response:
+    """
+    Build the bodiless 304 reply for a client that already has the current copy.
+
+    :param etag: The ETag of the current copy.
+    :type etag: str
+    :return: The 304 response, with the same caching headers as the full one.
+    :rtype: Response
+    """
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED,
+        headers={"ETag": etag, "Cache-Control": PUBLIC_FILE_CACHE_CONTROL},
+    )
+
+
 @router.get("/public/{receipt_id}/view")
 async def public_receipt(
     receipt_id: UUID,
     file_type: str = Query(..., description="Either 'txt' or 'qr'"),
-    line_length: int = Query(40, gt=0, description="Number of characters per line"),
+    line_length: int = Query(
+        DEFAULT_LINE_LENGTH, gt=0, le=MAX_LINE_LENGTH, description="Number of characters per line"
+    ),
     db: AsyncSession = Depends(get_db),
+    if_none_match: Optional[str] = Header(None),
 ):
     """
     Download a text or QR file associated with a public receipt.
 
-    If the files do not exist, they are generated, stored, and then returned.
+    Files are normally pre-generated when the receipt is created and served straight from disk;
+    if they do not exist yet, they are generated first. Only the text with the default line length
+    is stored; other line lengths are rendered in memory on every request. The response carries a
+    weak ETag and is marked as immutable for caches; a matching ``If-None-Match`` gets a bodiless
+    304 reply.
 
     :param receipt_id: The unique identifier of the public receipt.
     :type receipt_id: UUID
@@ -197,38 +346,69 @@ async def public_receipt(
     :type line_length: int
     :param db: The database session dependency.
     :type db: AsyncSession
-    :return: A FileResponse containing either a .txt or .png (QR) file.
-    :rtype: FileResponse
+    :param if_none_match: The ETag of the copy the client already has, if any.
+    :type if_none_match: Optional[str]
+    :return: A FileResponse containing either a .txt or .png (QR) file, the rendered text, or a 304 response.
+    :rtype: FileResponse | Response
     :raises HTTPException: If file_type is invalid, file is not found, or database errors occur.
     :raises Exception: For any unexpected error during file preparation or retrieval.
     """
     try:
-        if file_type not in ("txt", "qr"):
+        media_type = _FILE_MEDIA_TYPES.get(file_type)
+        if media_type is None:
             raise HTTPException(status_code=400, detail=messages.FILE_TYPE_ERROR)
 
-        # 1. Prepare the files (fetch or generate if missing)
-        text_path, qr_path = await prepare_receipt_files(db, receipt_id, line_length)
+        if file_type == "txt" and line_length != DEFAULT_LINE_LENGTH:
+            content = (await render_receipt_text(db, receipt_id, line_length)).encode("utf-8")
+            etag = f'W/"{zlib.crc32(content):x}-{len(content):x}"'
+            if if_none_match == etag:
+                return _not_modified(etag)
+            return Response(
+                content=content,
+                media_type=media_type,
+                headers={
+                    "Content-Disposition": f"inline; filename={receipt_id}_{line_length}.txt",
+                    "ETag": etag,
+                    "Cache-Control": PUBLIC_FILE_CACHE_CONTROL,
+                },
+            )
 
-        # 2. Return the requested file
+        # 1. Serve the pre-generated file if it exists, otherwise generate the files now
+        text_path, qr_path = receipt_file_paths(receipt_id)
         file_path = text_path if file_type == "txt" else qr_path
-        media_type = "text/plain" if file_type == "txt" else "image/png"
+        stat_result = _regular_file_stat(file_path)
+        if stat_result is None:
+            text_path, qr_path = await prepare_receipt_files(db, receipt_id)
+            file_path = text_path if file_type == "txt" else qr_path
+            stat_result = _regular_file_stat(file_path)
 
-        if not os.path.isfile(file_path):
+        # 2. Return the requested file
+        if stat_result is None:
             raise HTTPException(
                 status_code=404,
                 detail=f"{file_type.upper()} file not found on server"
             )
 
+        etag = f'W/"{stat_result.st_mtime_ns:x}-{stat_result.st_size:x}"'
+        if if_none_match == etag:
+            return _not_modified(etag)
+
         content_disposition = f"inline; filename={os.path.basename(file_path)}"
 
+        # Passing the stat result saves FileResponse its own stat call
         return FileResponse(
             path=file_path,
             media_type=media_type,
-            headers={"Content-Disposition": content_disposition},
+            headers={
+                "Content-Disposition": content_disposition,
+                "ETag": etag,
+                "Cache-Control": PUBLIC_FILE_CACHE_CONTROL,
+            },
+            stat_result=stat_result,
         )
 
     except HTTPException as http_err:
-        logger.exception("HTTP error while downloading receipt file: %s", http_err)
+        logger.warning("HTTP %s while downloading receipt file: %s", http_err.status_code, http_err.detail)
         raise http_err
 
     except Exception as err:
@@ -1,9 +1,16 @@
-import pickle
+import asyncio
+import base64
+import binascii
+import hashlib
+import hmac
+import time
 import datetime
 from datetime import timedelta
 from typing import Optional, Dict, Any
+from uuid import UUID
+
+import orjson
 
-import redis
 from jose import JWTError, jwt
 from fastapi import HTTPException, status, Depends
 from fastapi.security import OAuth2PasswordBearer
@@ -11,12 +18,97 @@ from passlib.context import CryptContext
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.persistence.connect import get_db
+from app.persistence.models import User
 from app.persistence.repository.auth import get_user_by_login
 from app.service import messages
+from app.service.cache import RedisCache, cache as shared_cache
 from app.service.config import config
 from app.service.logger import logger
 
 
+USER_CACHE_TTL = 60
+REFRESH_TOKEN_TTL = 7 * 24 * 60 * 60
+PASSWORD_CHECK_CACHE_TTL = 300
+TOKEN_PAYLOAD_CACHE_SIZE = 10000
+
+
+# The encoded header jose writes into every HS256 token (compact JSON with sorted keys)
+_HS256_HEADER = base64.urlsafe_b64encode(b'{"alg":"HS256","typ":"JWT"}').rstrip(b"=").decode()
+
+
+def _b64url_decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def _decode_hs256(token: str, key: bytes) -> Optional[Dict[str, Any]]:
+    """
+    Verify an HS256 JWT issued by this service without going through jose.
+
+    Only the exact header this service emits is recognized, and the payload is only returned
+    when the signature matches and the token has an ``exp`` in the future, no ``nbf`` or ``aud``,
+    a numeric ``iat`` and a string ``sub`` (when present). Anything else returns None and must be
+    decoded with jose, which applies its full claim validation and reports the precise error.
+
+    :param token: The JWT.
+    :type token: str
+    :param key: The HMAC key.
+    :type key: bytes
+    :return: The verified payload, or None if the token is not handled by this fast path.
+    :rtype: Optional[Dict[str, Any]]
+    """
+    header, _, rest = token.partition(".")
+    payload_segment, _, signature = rest.partition(".")
+    if header != _HS256_HEADER or not signature:
+        return None
+    try:
+        expected = hmac.new(key, f"{header}.{payload_segment}".encode(), hashlib.sha256).digest()
+        if not hmac.compare_digest(expected, _b64url_decode(signature)):
+            return None
+        payload = orjson.loads(_b64url_decode(payload_segment))
+    except (binascii.Error, ValueError):
+        return None
+    if not isinstance(payload, dict) or "nbf" in payload or "aud" in payload:
+        return None
+    if "iat" in payload and not isinstance(payload["iat"], (int, float)):
+        return None
+    if "sub" in payload and not isinstance(payload["sub"], str):
+        return None
+    exp = payload.get("exp")
+    if not isinstance(exp, (int, float)) or exp <= time.time():
+        return None
+    return payload
+
+
+def _user_cache_key(login: str) -> str:
+    return f"user:v2:{login}"
+
+
+def _user_to_cache(user: User) -> Dict[str, Any]:
+    """
+    Build the cached JSON payload with the fields of a user that requests need.
+
+    The password hash and refresh token are deliberately left out of the cache.
+
+    :param user: The user loaded from the database.
+    :type user: User
+    :return: A JSON-serializable payload.
+    :rtype: Dict[str, Any]
+    """
+    return {"id": user.id, "name": user.name, "login": user.login}
+
+
+def _user_from_cache(data: Dict[str, Any]) -> User:
+    """
+    Rebuild a transient (session-less) user from a cached payload.
+
+    :param data: The payload produced by ``_user_to_cache`` and decoded from JSON.
+    :type data: Dict[str, Any]
+    :return: The user with its id, name and login set.
+    :rtype: User
+    """
+    return User(id=UUID(data["id"]), name=data["name"], login=data["login"])
+
+
 class Auth:
     """
     A service class handling authentication and token management using timezone-aware datetimes in UTC.
@@ -25,24 +117,74 @@ class Auth:
         pwd_context (CryptContext): A passlib CryptContext for password hashing.
         SECRET_KEY (str): The secret key used for JWT encoding.
         ALGORITHM (str): The algorithm used for JWT encoding.
+        ALGORITHMS (tuple): The algorithms accepted when decoding, built once.
         oauth2_scheme (OAuth2PasswordBearer): The OAuth2 scheme for token retrieval.
-        cache (redis.Redis): Redis client instance for caching user data.
+        cache (RedisCache): The shared fail-open Redis cache for users and password checks.
+        _token_payloads (dict): Verified access token payloads, keyed by the token string.
     """
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12)
     SECRET_KEY: str = config.secret_key
     ALGORITHM: str = config.algorithm
+    ALGORITHMS: tuple = (config.algorithm,)
+    _SECRET_KEY_BYTES: bytes = config.secret_key.encode()
     oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
-    cache = redis.Redis(
-        host=config.redis_host,
-        port=config.redis_port,
-        password=config.redis_password,
-        db=0,
-    )
+    # Connection limits, timeouts and the circuit breaker live in RedisCache
+    cache: RedisCache = shared_cache
+
+    def __init__(self):
+        self._token_payloads: Dict[str, Dict[str, Any]] = {}
+
+    def warm_up(self) -> None:
+        """
+        Initializes the JWT signer and the bcrypt backend ahead of the first request.
+
+        passlib selects and loads its bcrypt backend and jose imports the signing key lazily,
+        on first use; doing it at startup keeps that cost out of the first login.
+        """
+        token = jwt.encode({"sub": "", "scope": "warm_up"}, self.SECRET_KEY, algorithm=self.ALGORITHM)
+        jwt.decode(token, self.SECRET_KEY, algorithms=self.ALGORITHMS)
+        self.pwd_context.handler("bcrypt").get_backend()
+
+    def _decode_access_token(self, token: str) -> Dict[str, Any]:
+        """
+        Decodes and verifies an access token, reusing the payload of a token seen before.
+
+        Verified payloads are kept in memory until the token expires, so a token that is sent
+        with every request is only verified (HMAC and JSON parsing) once per process. HS256 tokens
+        are verified directly with ``hmac`` (see ``_decode_hs256``); jose is the fallback. The cache
+        holds at most ``TOKEN_PAYLOAD_CACHE_SIZE`` tokens, the oldest one is dropped first. The
+        secret key is read once at startup, so rotating it (a restart) also empties the cache.
+
+        :param token: The JWT access token.
+        :type token: str
+        :return: The verified token payload.
+        :rtype: Dict[str, Any]
+        :raises JWTError: If the token is invalid or expired.
+        """
+        payload = self._token_payloads.get(token)
+        if payload is not None and payload.get("exp", 0) > time.time():
+            return payload
+
+        payload = None
+        if self.ALGORITHM == "HS256":
+            payload = _decode_hs256(token, self._SECRET_KEY_BYTES)
+        if payload is None:
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=self.ALGORITHMS)
+        self._token_payloads.pop(token, None)
+        if len(self._token_payloads) >= TOKEN_PAYLOAD_CACHE_SIZE:
+            del self._token_payloads[next(iter(self._token_payloads))]
+        self._token_payloads[token] = payload
+        return payload
 
-    def verify_password(self, plain_password: str, hashed_password: str) -> bool:
+    async def verify_password(self, plain_password: str, hashed_password: str) -> bool:
         """
         Verifies a plain text password against a hashed password.
 
+        bcrypt is CPU-bound (tens of milliseconds), so the check runs in a worker thread
+        to keep the event loop free. Successful checks are remembered in Redis for
+        ``PASSWORD_CHECK_CACHE_TTL`` seconds under an HMAC of the password and the hash (keyed
+        with the secret key), so repeated logins skip bcrypt. Failed checks are never cached.
+
         :param plain_password: The plain text password.
         :type plain_password: str
         :param hashed_password: The hashed password to compare against.
@@ -51,11 +193,23 @@ class Auth:
         :rtype: bool
         """
         logger.debug("Verifying password.")
-        return self.pwd_context.verify(plain_password, hashed_password)
+        digest = hmac.new(
+            self.SECRET_KEY.encode(),
+            f"{plain_password}|{hashed_password}".encode(),
+            hashlib.sha256,
+        ).hexdigest()
+        key = f"pw:{digest}"
+        if await self.cache.get(key):
+            return True
 
-    def get_password_hash(self, password: str) -> str:
+        verified = await asyncio.to_thread(self.pwd_context.verify, plain_password, hashed_password)
+        if verified:
+            await self.cache.set(key, True, ex=PASSWORD_CHECK_CACHE_TTL)
+        return verified
+
+    async def get_password_hash(self, password: str) -> str:
         """
-        Hashes a plain text password using bcrypt.
+        Hashes a plain text password using bcrypt, in a worker thread.
 
         :param password: The plain text password.
         :type password: str
@@ -63,7 +217,7 @@ class Auth:
         :rtype: str
         """
         logger.debug("Generating password hash.")
-        return self.pwd_context.hash(password)
+        return await asyncio.to_thread(self.pwd_context.hash, password)
 
     async def create_access_token(
         self,
@@ -124,7 +278,7 @@ class Auth:
         if expires_delta:
             expire = now_utc + timedelta(seconds=expires_delta)
         else:
-            expire = now_utc + timedelta(days=7)
+            expire = now_utc + timedelta(seconds=REFRESH_TOKEN_TTL)
 
         to_encode.update({
             "iat": now_utc,
@@ -151,10 +305,10 @@ class Auth:
         """
         logger.debug("Decoding token to get login (sub).")
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = jwt.decode(token, self.SECRET_KEY, algorithms=self.ALGORITHMS)
             return payload["sub"]
         except JWTError as e:
-            logger.exception("Error decoding token to extract login.")
+            logger.warning("Error decoding token to extract login: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
                 detail=messages.INVALID_SCOPE_TOKEN,
@@ -172,7 +326,7 @@ class Auth:
         """
         logger.debug("Decoding and validating refresh token.")
         try:
-            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = jwt.decode(refresh_token, self.SECRET_KEY, algorithms=self.ALGORITHMS)
             if payload.get("scope") == "refresh_token":
                 return payload["sub"]
             logger.error("Token scope is not refresh_token.")
@@ -180,8 +334,8 @@ class Auth:
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=messages.INVALID_SCOPE_TOKEN,
             )
-        except JWTError:
-            logger.exception("Refresh token is invalid or expired.")
+        except JWTError as e:
+            logger.warning("Refresh token is invalid or expired: %s", e)
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=messages.VALIDATE_CREDENTIALS,
@@ -211,7 +365,7 @@ class Auth:
         )
 
         try:
-            payload = jwt.decode(token, self.SECRET_KEY, algorithms=[self.ALGORITHM])
+            payload = self._decode_access_token(token)
             if payload.get("scope") != "access_token":
                 logger.error("Token scope is not 'access_token'.")
                 raise credentials_exception
@@ -220,25 +374,27 @@ class Auth:
             if not login:
                 logger.error("No 'sub' found in token payload.")
                 raise credentials_exception
-        except JWTError:
-            logger.exception("Error decoding or validating token.")
+        except JWTError as e:
+            logger.warning("Error decoding or validating token: %s", e)
             raise credentials_exception
 
-        # Attempt to get user from Redis cache
-        cached_user = self.cache.get(f"user:{login}")
-        if cached_user is None:
-            logger.debug(f"User not found in cache. Querying database for login: {login}.")
-            user_db = await get_user_by_login(login, db)
-            if user_db is None:
-                logger.error("No user found in database with given login.")
-                raise credentials_exception
-
-            self.cache.set(f"user:{login}", pickle.dumps(user_db))
-            self.cache.expire(f"user:{login}", 900)  # 15-minute cache expiration
-            return user_db
-        else:
+        # Attempt to get user from Redis cache; an unavailable Redis only costs a database query
+        key = _user_cache_key(login)
+        cached_user = await self.cache.get(key)
+        if cached_user is not None:
             logger.debug("User found in cache. Deserializing data.")
-            return pickle.loads(cached_user)
+            return _user_from_cache(cached_user)
+
+        logger.debug(f"User not found in cache. Querying database for login: {login}.")
+        user_db = await get_user_by_login(login, db)
+        if user_db is None:
+            logger.error("No user found in database with given login.")
+            raise credentials_exception
+
+        # A short TTL bounds how stale a cached user can get; the entry never outlives the token
+        expires_in = int(payload["exp"] - time.time()) if "exp" in payload else USER_CACHE_TTL
+        await self.cache.set(key, _user_to_cache(user_db), ex=max(1, min(USER_CACHE_TTL, expires_in)))
+        return user_db
 
 
 auth_service = Auth()
@@ -0,0 +1,177 @@
+import functools
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+import orjson
+import redis.asyncio as redis
+from fastapi import Response
+from redis.exceptions import RedisError
+
+from app.service.config import config
+from app.service.logger import logger
+
+CIRCUIT_OPEN_SECONDS = 30.0
+SOCKET_TIMEOUT_SECONDS = 0.25
+
+
+class RedisCache:
+    """
+    A fail-open JSON cache on top of an async Redis connection pool.
+
+    Cache errors never reach the caller: a failed call is treated as a miss and opens a circuit
+    breaker for ``CIRCUIT_OPEN_SECONDS``, during which Redis is not contacted at all, so an
+    unavailable Redis does not add latency to every request.
+
+    :ivar _redis: The async Redis client.
+    :vartype _redis: redis.Redis
+    :ivar _open_until: Monotonic time until which the circuit breaker stays open.
+    :vartype _open_until: float
+    """
+
+    def __init__(self, pool: redis.ConnectionPool):
+        """
+        Initialize the cache with a Redis connection pool.
+
+        :param pool: The connection pool used by the cache client.
+        :type pool: redis.ConnectionPool
+        """
+        self._redis = redis.Redis(connection_pool=pool)
+        self._open_until = 0.0
+
+    def _trip(self, exc: Exception) -> None:
+        logger.warning("Redis cache unavailable (%s), bypassing it for %.0fs", exc, CIRCUIT_OPEN_SECONDS)
+        self._open_until = time.monotonic() + CIRCUIT_OPEN_SECONDS
+
+    async def get(self, key: str) -> Optional[Any]:
+        """
+        Read and decode a cached JSON value.
+
+        :param key: The cache key.
+        :type key: str
+        :return: The decoded value, or None on a miss or if Redis is unavailable.
+        :rtype: Optional[Any]
+        """
+        if time.monotonic() < self._open_until:
+            return None
+        try:
+            raw = await self._redis.get(key)
+        except (RedisError, OSError) as exc:
+            self._trip(exc)
+            return None
+        return None if raw is None else orjson.loads(raw)
+
+    async def set(self, key: str, value: Any, ex: int) -> None:
+        """
+        Encode a value as JSON and store it with an expiration time.
+
+        :param key: The cache key.
+        :type key: str
+        :param value: The value to store; types unknown to orjson (e.g. Decimal) are stored as strings.
+        :type value: Any
+        :param ex: The expiration time in seconds.
+        :type ex: int
+        """
+        if time.monotonic() < self._open_until:
+            return
+        try:
+            await self._redis.set(key, orjson.dumps(value, default=str), ex=ex)
+        except (RedisError, OSError) as exc:
+            self._trip(exc)
+
+    async def delete(self, key: str) -> None:
+        """
+        Remove a key from the cache.
+
+        :param key: The cache key.
+        :type key: str
+        """
+        if time.monotonic() < self._open_until:
+            return
+        try:
+            await self._redis.delete(key)
+        except (RedisError, OSError) as exc:
+            self._trip(exc)
+
+    async def incr(self, key: str) -> None:
+        """
+        Increment an integer counter, creating it with the value 1 if it does not exist.
+
+        The counter is stored as plain digits, so ``get`` decodes it as an int.
+
+        :param key: The counter key, e.g. ``"receipts:list:gen:<user_id>"``.
+        :type key: str
+        """
+        if time.monotonic() < self._open_until:
+            return
+        try:
+            await self._redis.incr(key)
+        except (RedisError, OSError) as exc:
+            self._trip(exc)
+
+    async def close(self) -> None:
+        """
+        Disconnect all connections of the underlying pool.
+        """
+        await self._redis.connection_pool.disconnect()
+
+
+cache = RedisCache(
+    redis.ConnectionPool(
+        host=config.redis_host,
+        port=config.redis_port,
+        password=config.redis_password,
+        db=0,
+        max_connections=64,
+        socket_timeout=SOCKET_TIMEOUT_SECONDS,
+        socket_connect_timeout=SOCKET_TIMEOUT_SECONDS,
+        socket_keepalive=True,
+    )
+)
+
+
+def cached_response(
+    prefix: str,
+    expire: int,
+    key_builder: Callable[..., Awaitable[str]],
+    headers: tuple[str, ...] = (),
+) -> Callable:
+    """
+    Cache the rendered body of an endpoint that returns a ``Response``.
+
+    The endpoint must be called with keyword arguments (as FastAPI does). Only successful
+    (status 200) responses are cached, together with the listed headers; on a hit the stored
+    bytes are returned without calling the endpoint.
+
+    :param prefix: The key prefix, e.g. ``"receipts:list"``.
+    :type prefix: str
+    :param expire: The expiration time in seconds.
+    :type expire: int
+    :param key_builder: Builds the rest of the key from the endpoint's keyword arguments (async,
+                        so it can read e.g. a per-user generation from the cache).
+    :type key_builder: Callable[..., Awaitable[str]]
+    :param headers: The response headers to store along with the body.
+    :type headers: tuple[str, ...]
+    :return: The decorator.
+    :rtype: Callable
+    """
+    def decorator(func: Callable[..., Awaitable[Response]]) -> Callable[..., Awaitable[Response]]:
+        @functools.wraps(func)
+        async def wrapper(**kwargs: Any) -> Response:
+            key = f"{prefix}:{await key_builder(**kwargs)}"
+            hit = await cache.get(key)
+            if hit is not None:
+                return Response(
+                    content=hit["body"].encode(),
+                    media_type="application/json",
+                    headers=hit["headers"],
+                )
+
+            response = await func(**kwargs)
+            if response.status_code == 200:
+                stored_headers = {name: response.headers[name] for name in headers if name in response.headers}
+                await cache.set(key, {"body": response.body.decode(), "headers": stored_headers}, ex=expire)
+            return response
+
+        return wrapper
+
+    return decorator
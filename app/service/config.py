@@ -10,11 +10,18 @@ class Settings(BaseSettings):
     postgres_db: str = "DB"
     postgres_host: str = "DB_HOST"
     postgres_port: int = 5433
+    # Per worker process: the total is workers * (db_pool_size + db_max_overflow)
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
 
     redis_host: str = "REDIS_HOST"
     redis_port: int = 6379
     redis_password: str = "REDIS_PASSWORD"
 
+    serve_static: bool = False
+    cors_origins: list[str] = ["*"]
+    public_base_url: str = "http://0.0.0.0:8000"
+
     model_config = SettingsConfigDict(
         env_file=".env", env_file_encoding="utf-8", extra="ignore"
     )
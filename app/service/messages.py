@@ -4,7 +4,6 @@ ACCOUNT_EXIST = "Account already exists"
 INVALID_LOGIN = "Invalid login"
 BAD_PASSWORD = "Invalid password"
 BAD_REFRESH_TOKEN = "Invalid refresh token"
-INVALID_PAYMENT_TYPE = "Invalid payment type, must be 'cash' or 'card'."
 AMOUNT_REQUIRED_FOR_CASH = "Amount is required for cash payments."
 DB_INCORRECT_VALUE = "Incorrect value from the database."
 DB_CANNOT_CONNECT = "Cannot connect to the database."
@@ -14,3 +13,4 @@ ERROR_MONEY = "Insufficient cash provided"
 CREATE_RECP_ERROR = "An unexpected error occurred while creating the receipt."
 GET_RECP_ERROR = "An unexpected error occurred while listing receipts."
 DOWNLOAD_URL_ERROR = "An unexpected error occurred while preparing or retrieving the file."
+INVALID_CURSOR = "Invalid pagination cursor"
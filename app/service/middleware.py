@@ -0,0 +1,143 @@
+from typing import Sequence
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+
+
+class FastCORSMiddleware:
+    """
+    Pure ASGI CORS middleware.
+
+    Unlike ``BaseHTTPMiddleware``-based middlewares, it does not spawn an extra task, does not
+    build ``Request``/``Response`` objects and does not buffer the response body. All CORS
+    headers are precomputed in ``__init__``: with the ``"*"`` wildcard a single static header is
+    appended to every response, with an explicit origin list the header block of the matching
+    origin is looked up by the request's ``Origin`` header. Preflight requests are answered
+    directly from the precomputed blocks, plus the requested headers echoed back: a ``"*"``
+    ``access-control-allow-headers`` never covers ``Authorization`` and is taken literally
+    for credentialed requests.
+
+    Credentials are only allowed for explicit origins, since browsers reject a wildcard origin
+    combined with ``access-control-allow-credentials``.
+
+    :ivar app: The wrapped ASGI application.
+    :vartype app: ASGIApp
+    :ivar _allow_all: Whether any origin is allowed.
+    :vartype _allow_all: bool
+    :ivar _simple_headers: The headers appended to regular responses, keyed by origin.
+    :vartype _simple_headers: dict[bytes, list[tuple[bytes, bytes]]]
+    :ivar _pre_headers: The headers sent in response to a preflight request, keyed by origin.
+    :vartype _pre_headers: dict[bytes, list[tuple[bytes, bytes]]]
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        allow_origins: Sequence[str] = ("*",),
+        allow_credentials: bool = False,
+        max_age: int = 600,
+    ):
+        """
+        Initialize the middleware and precompute the CORS headers.
+
+        :param app: The ASGI application to wrap.
+        :type app: ASGIApp
+        :param allow_origins: The allowed origins, ``"*"`` allows any origin.
+        :type allow_origins: Sequence[str]
+        :param allow_credentials: Whether to allow credentials for explicit origins.
+        :type allow_credentials: bool
+        :param max_age: How long, in seconds, browsers may cache a preflight response.
+        :type max_age: int
+        """
+        self.app = app
+        self._allow_all = "*" in allow_origins
+        origins = [b"*"] if self._allow_all else [o.encode("latin-1") for o in allow_origins]
+
+        self._simple_headers: dict[bytes, list[tuple[bytes, bytes]]] = {}
+        self._pre_headers: dict[bytes, list[tuple[bytes, bytes]]] = {}
+        for origin in origins:
+            simple = [(b"access-control-allow-origin", origin)]
+            if not self._allow_all:
+                if allow_credentials:
+                    simple.append((b"access-control-allow-credentials", b"true"))
+                simple.append((b"vary", b"Origin"))
+            self._simple_headers[origin] = simple
+            self._pre_headers[origin] = [
+                *simple,
+                (b"access-control-allow-methods", ALLOW_METHODS),
+                (b"access-control-max-age", str(max_age).encode("latin-1")),
+                (b"content-length", b"0"),
+            ]
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """
+        Handle an ASGI call, answering preflights and decorating regular HTTP responses.
+
+        :param scope: The ASGI connection scope.
+        :type scope: Scope
+        :param receive: The ASGI receive callable.
+        :type receive: Receive
+        :param send: The ASGI send callable.
+        :type send: Send
+        """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        origin, is_preflight, request_headers = self._read_headers(scope)
+        key = b"*" if self._allow_all else origin
+
+        if scope["method"] == "OPTIONS" and is_preflight:
+            pre_headers = self._pre_headers.get(key)
+            if pre_headers is None:
+                await send({
+                    "type": "http.response.start",
+                    "status": 400,
+                    "headers": [(b"content-type", b"text/plain; charset=utf-8")],
+                })
+                await send({"type": "http.response.body", "body": b"Disallowed CORS origin"})
+                return
+            if request_headers is not None:
+                pre_headers = [*pre_headers, (b"access-control-allow-headers", request_headers)]
+            await send({"type": "http.response.start", "status": 204, "headers": pre_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        cors_headers = self._simple_headers.get(key)
+        if cors_headers is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cors(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                # Copy instead of appending in place: Starlette passes the response's own
+                # raw_headers list, which may belong to a reused response object.
+                message["headers"] = [*message.get("headers", ()), *cors_headers]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cors)
+
+    @staticmethod
+    def _read_headers(scope: Scope) -> tuple[bytes | None, bool, bytes | None]:
+        """
+        Extract the request origin and check whether the request is a CORS preflight request.
+
+        :param scope: The ASGI connection scope.
+        :type scope: Scope
+        :return: The ``Origin`` header value (or None), whether the request carries an
+                 ``access-control-request-method`` header, and the
+                 ``access-control-request-headers`` value (or None).
+        :rtype: tuple[bytes | None, bool, bytes | None]
+        """
+        origin = None
+        is_preflight = False
+        request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                is_preflight = True
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        return origin, is_preflight, request_headers
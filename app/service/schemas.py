@@ -1,9 +1,9 @@
 from decimal import Decimal
-from typing import List, Optional
+from typing import List, Literal, Optional
 from uuid import UUID
 from datetime import datetime
 
-from pydantic import BaseModel, Field, ConfigDict, model_validator, field_validator
+from pydantic import BaseModel, Field, ConfigDict, model_validator
 
 from app.service import messages
 from app.service.logger import logger
@@ -128,31 +128,14 @@ class PaymentData(BaseModel):
     Payment details for a transaction.
 
     :ivar type: The type of payment; must be either 'cash' or 'card'.
-    :vartype type: str
+    :vartype type: Literal["cash", "card"]
     :ivar amount: The payment amount; required if the payment type is 'cash'.
     :vartype amount: Optional[Decimal]
     """
-    type: str
+    # Checked by pydantic-core itself, no Python validator is involved
+    type: Literal["cash", "card"]
     amount: Optional[Decimal] = None
 
-    @field_validator("type")
-    @classmethod
-    def validate_type(cls, v):
-        """
-        Validates the payment type to ensure it is either 'cash' or 'card'.
-
-        :param v: The payment type value.
-        :type v: str
-        :raises ValueError: If the payment type is invalid.
-        :return: The validated payment type.
-        :rtype: str
-        """
-        logger.debug("Validating payment type: %s", v)
-        if v not in ("cash", "card"):
-            logger.error(messages.INVALID_PAYMENT_TYPE)
-            raise ValueError(messages.INVALID_PAYMENT_TYPE)
-        return v
-
     @model_validator(mode="after")
     def check_cash_amount(self):
         """
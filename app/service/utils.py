@@ -1,19 +1,95 @@
+import asyncio
+import base64
+import binascii
+import functools
 import os
+import struct
+import threading
+import zlib
+from datetime import datetime
 from decimal import Decimal
-from typing import List, Tuple
-from uuid import UUID
+from typing import Any, Callable, Dict, Final, List, Tuple
+from uuid import UUID, uuid4
 
+import orjson
 import qrcode
 from fastapi import HTTPException
+from fastapi.responses import ORJSONResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.persistence.connect import sessionmanager
 from app.persistence.models import PaymentType, Receipt
 from app.persistence.repository.receipts import fetch_receipt_by_id_public
 from app.service import messages
-from app.service.schemas import CalculatedProduct, ReceiptCreateSchema, ReceiptResponseOut, ReceiptItemResponse
-
+from app.service.config import config
+from app.service.logger import logger
+from app.service.schemas import CalculatedProduct, ReceiptCreateSchema
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+SELLER_NAME: Final[str] = "ФОП Джонсонюк Борис"
+TOTAL_LABEL: Final[str] = "СУМА"
+CARD_LABEL: Final[str] = "Картка"
+CASH_LABEL: Final[str] = "Готівка"
+CHANGE_LABEL: Final[str] = "Решта"
+THANK_YOU: Final[str] = "Дякуємо за покупку!"
 TEXT_RECEIPT_DIR = "/app/static/text_receipts"
 QR_CODE_DIR = "/app/static/qr_codes"
+# Joined once; per-receipt paths are then a single string format
+_TEXT_PATH_PREFIX = os.path.join(TEXT_RECEIPT_DIR, "")
+_QR_PATH_PREFIX = os.path.join(QR_CODE_DIR, "")
+DEFAULT_LINE_LENGTH = 40
+MAX_LINE_LENGTH = 120
+RECEIPT_FILES_QUEUE_SIZE = 1000
+# The link encoded in receipt QR codes, pointing at the public text view of the receipt
+PUBLIC_RECEIPT_URL = (
+    config.public_base_url.rstrip("/")
+    + "/receipt/public/{receipt_id}/view?file_type=txt&line_length="
+    + str(DEFAULT_LINE_LENGTH)
+)
+QR_BOX_SIZE = 10
+QR_BORDER = 4
+# One QR encoder per process, reset before every use (see generate_qr_code)
+_QR = qrcode.QRCode(error_correction=qrcode.constants.ERROR_CORRECT_M, box_size=1, border=QR_BORDER)
+_QR_LOCK = threading.Lock()
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, Decimal):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+class DecimalORJSONResponse(ORJSONResponse):
+    """
+    ORJSONResponse that also serializes Decimal values, as strings (the same format pydantic uses).
+
+    UUID and datetime values are handled natively by orjson, so receipt payloads can be rendered
+    directly, without ``jsonable_encoder`` or response model validation.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, default=_json_default)
+
+
+@functools.lru_cache(maxsize=8)
+def _receipt_frame(line_length: int) -> Tuple[str, str, str, str]:
+    """
+    Build the parts of a receipt text that only depend on the line length.
+
+    Receipts are rendered with a handful of line lengths, so the results are cached.
+
+    :param line_length: Number of characters per line.
+    :type line_length: int
+    :return: The centered seller name, the separator, the item separator and the centered
+             thank-you line.
+    :rtype: Tuple[str, str, str, str]
+    """
+    return (
+        SELLER_NAME.center(line_length),
+        "=" * line_length,
+        "-" * line_length,
+        THANK_YOU.center(line_length),
+    )
 
 
 def generate_receipt_text(receipt: Receipt, line_length: int) -> str:
@@ -27,63 +103,94 @@ def generate_receipt_text(receipt: Receipt, line_length: int) -> str:
     :return: A multiline string representing the formatted receipt text.
     :rtype: str
     """
-    seller_name = "ФОП Джонсонюк Борис"
-    separator = "=" * line_length
-    lines: List[str] = [seller_name.center(line_length), separator]
+    header, separator, item_separator, thank_you = _receipt_frame(line_length)
+    lines: List[str] = [header, separator]
 
     for item in receipt.items:
-        product_total: Decimal = item.unit_price * item.quantity
-        left_line1 = f"{item.unit_price:.2f} x {item.quantity}"
-        right_line1 = f"{product_total:,.2f}"
-        line1 = f"{left_line1:<{line_length - len(right_line1)}}{right_line1}"
-
-        left_line2 = f"{item.product_name}"
-        right_line2 = f"{product_total:,.2f}"
-        line2 = f"{left_line2:<{line_length - len(right_line2)}}{right_line2}"
-
-        lines.append(line1)
-        lines.append(line2)
-        lines.append("-" * line_length)
+        # The item total is formatted once and shared by both lines of the item
+        total_str = f"{item.unit_price * item.quantity:,.2f}"
+        width = line_length - len(total_str)
+        lines.extend((
+            f"{f'{item.unit_price:.2f} x {item.quantity}':<{width}}{total_str}",
+            f"{item.product_name:<{width}}{total_str}",
+            item_separator,
+        ))
 
     lines.append(separator)
     total_str = f"{receipt.total_amount:,.2f}"
-    total_line = f"{'СУМА':<{line_length - len(total_str)}}{total_str}"
+    total_line = f"{TOTAL_LABEL:<{line_length - len(total_str)}}{total_str}"
     lines.append(total_line)
 
-    if receipt.payment_type == PaymentType.card:
-        payment_label = "Картка"
+    if receipt.payment_type is PaymentType.card:
+        payment_label = CARD_LABEL
         payment_amount = receipt.total_amount
     else:
-        payment_label = "Готівка"
+        payment_label = CASH_LABEL
         payment_amount = receipt.paid_amount
 
     payment_amount_str = f"{payment_amount:,.2f}"
     payment_line = f"{payment_label:<{line_length - len(payment_amount_str)}}{payment_amount_str}"
     lines.append(payment_line)
 
-    if receipt.payment_type == PaymentType.card:
-        change = Decimal("0.00")
-    else:
-        change = receipt.paid_amount - receipt.total_amount
-
-    change_str = f"{change:,.2f}"
-    change_line = f"{'Решта':<{line_length - len(change_str)}}{change_str}"
+    change_str = f"{receipt.rest:,.2f}"
+    change_line = f"{CHANGE_LABEL:<{line_length - len(change_str)}}{change_str}"
     lines.append(change_line)
     lines.append(separator)
 
     date_str = receipt.created_at.strftime("%d.%m.%Y %H:%M")
     lines.append(date_str.center(line_length))
-
-    thank_you = "Дякуємо за покупку!"
-    lines.append(thank_you.center(line_length))
+    lines.append(thank_you)
 
     return "\n".join(lines)
 
 
+def encode_png_bitmap(matrix: List[List[bool]], scale: int) -> bytes:
+    """
+    Encodes a matrix of dark (True) and light (False) modules as a 1-bit grayscale PNG.
+
+    Every module becomes a ``scale`` x ``scale`` square. A scanline is built once per matrix row
+    as a bit string, packed into bytes with ``int.to_bytes`` and repeated ``scale`` times, so the
+    image never exists as individual pixels.
+
+    :param matrix: The square module matrix, row by row.
+    :type matrix: List[List[bool]]
+    :param scale: The size of a module in pixels.
+    :type scale: int
+    :return: The PNG file contents.
+    :rtype: bytes
+    """
+    width = len(matrix) * scale
+    row_bytes = (width + 7) // 8
+    padding = "1" * (row_bytes * 8 - width)
+    light, dark = "1" * scale, "0" * scale
+
+    raw = bytearray()
+    for row in matrix:
+        bits = "".join(dark if module else light for module in row) + padding
+        # Filter type 0 (none) followed by the packed pixels
+        scanline = b"\x00" + int(bits, 2).to_bytes(row_bytes, "big")
+        raw += scanline * scale
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    header = struct.pack(">IIBBBBB", width, width, 1, 0, 0, 0, 0)
+    return b"".join((
+        b"\x89PNG\r\n\x1a\n",
+        chunk(b"IHDR", header),
+        chunk(b"IDAT", zlib.compress(bytes(raw), 6)),
+        chunk(b"IEND", b""),
+    ))
+
+
 def generate_qr_code(url: str, file_path: str):
     """
     Generates a QR code from the provided URL and saves it to a file.
 
+    The qrcode library only computes the module matrix, using a single module-level encoder
+    that is reset for every code; the PNG is encoded directly by ``encode_png_bitmap`` as a
+    1-bit image, without building an image object.
+
     :param url: The URL to be encoded in the QR code.
     :type url: str
     :param file_path: The path where the QR code image will be saved.
@@ -91,8 +198,14 @@ def generate_qr_code(url: str, file_path: str):
     :raises IOError: If there's an issue writing the QR code to the file system.
     :raises Exception: Any unexpected error encountered by the qrcode library.
     """
-    qr = qrcode.make(url)
-    qr.save(file_path)
+    # The shared encoder is stateful; files are generated from several worker threads
+    with _QR_LOCK:
+        _QR.clear()
+        _QR.version = None
+        _QR.add_data(url)
+        _QR.make(fit=True)
+        matrix = _QR.get_matrix()
+    _write_bytes(file_path, encode_png_bitmap(matrix, QR_BOX_SIZE))
 
 
 def calculate_receipt_details(receipt_request: ReceiptCreateSchema) -> Tuple[List[CalculatedProduct], Decimal, Decimal]:
@@ -107,20 +220,19 @@ def calculate_receipt_details(receipt_request: ReceiptCreateSchema) -> Tuple[Lis
     """
     total_sum = Decimal("0.00")
     calculated_products: List[CalculatedProduct] = []
+    # The values were validated with the request; model_construct skips validating them again
+    construct = CalculatedProduct.model_construct
 
     for product in receipt_request.products:
         total = product.price * product.quantity
         total_sum += total
-        calculated_product = CalculatedProduct(
-            name=product.name,
-            price=product.price,
-            quantity=product.quantity,
-            total=total
+        calculated_products.append(
+            construct(name=product.name, price=product.price, quantity=product.quantity, total=total)
         )
-        calculated_products.append(calculated_product)
 
-    if receipt_request.payment.type == "cash":
-        rest = receipt_request.payment.amount - total_sum
+    payment = receipt_request.payment
+    if payment.type == "cash":
+        rest = payment.amount - total_sum
         if rest < 0:
             raise HTTPException(status_code=400, detail=messages.ERROR_MONEY)
     else:
@@ -129,118 +241,207 @@ def calculate_receipt_details(receipt_request: ReceiptCreateSchema) -> Tuple[Lis
     return calculated_products, total_sum, rest
 
 
-def get_paid_and_rest(
-    payment_type: PaymentType,
-    total_amount: Decimal,
-    paid_amount: Decimal
-) -> Tuple[Decimal, Decimal]:
+def encode_cursor(created_at: datetime, receipt_id: UUID) -> str:
     """
-    Computes how much was actually paid and how much remains (rest).
+    Encodes the position of a receipt in the listing order as an opaque pagination cursor.
 
-    :param payment_type: The type of payment (card or cash).
-    :type payment_type: PaymentType
-    :param total_amount: The total amount of the receipt.
-    :type total_amount: Decimal
-    :param paid_amount: The amount actually paid for the receipt.
-    :type paid_amount: Decimal
-    :return: A tuple of (paid_amount, rest).
-    :rtype: Tuple[Decimal, Decimal]
+    :param created_at: The creation timestamp of the last receipt on the page.
+    :type created_at: datetime
+    :param receipt_id: The ID of the last receipt on the page.
+    :type receipt_id: UUID
+    :return: A URL-safe cursor string.
+    :rtype: str
     """
-    if payment_type == PaymentType.card:
-        # For card, assume full payment has been made
-        return total_amount, Decimal("0.00")
-    else:
-        # For cash, paid_amount is the actual paid amount
-        return paid_amount, paid_amount - total_amount
+    raw = f"{created_at.isoformat()}|{receipt_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode()
+
 
+def decode_cursor(cursor: str) -> Tuple[datetime, UUID]:
+    """
+    Decodes a pagination cursor produced by ``encode_cursor``.
 
-def build_receipt_response_out(receipt: Receipt) -> ReceiptResponseOut:
+    :param cursor: The cursor string received from the client.
+    :type cursor: str
+    :return: A tuple of (created_at, receipt_id).
+    :rtype: Tuple[datetime, UUID]
+    :raises HTTPException: If the cursor is malformed.
     """
-    Converts a receipt ORM object into a ReceiptResponseOut schema instance.
+    try:
+        created_at, receipt_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), UUID(receipt_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise HTTPException(status_code=400, detail=messages.INVALID_CURSOR)
+
+
+def build_receipt_response_out(receipt: Receipt) -> Dict[str, Any]:
+    """
+    Converts a receipt ORM object into a plain dict shaped like ReceiptResponseOut.
+
+    The data comes from the database and is already trusted, so no pydantic model is built;
+    the dict is rendered by ``DecimalORJSONResponse``.
 
     :param receipt: A receipt ORM object, including related items and payment details.
     :type receipt: Receipt
-    :return: The Pydantic response schema for the receipt.
-    :rtype: ReceiptResponseOut
+    :return: The receipt payload in the ReceiptResponseOut format.
+    :rtype: Dict[str, Any]
     """
-    paid_amount, rest = get_paid_and_rest(
-        payment_type=receipt.payment_type,
-        total_amount=receipt.total_amount,
-        paid_amount=receipt.paid_amount
-    )
-    return ReceiptResponseOut(
-        id=receipt.id,
-        products=[ReceiptItemResponse.model_validate(item) for item in receipt.items],
-        payment_type=(
-            receipt.payment_type.value
-            if hasattr(receipt.payment_type, "value")
-            else receipt.payment_type
-        ),
-        total=receipt.total_amount,
-        paid_amount=paid_amount,
-        rest=rest,
-        created_at=receipt.created_at
-    )
+    # Card payments always cover the full total; ``rest`` is a generated column
+    paid_amount = receipt.total_amount if receipt.payment_type is PaymentType.card else receipt.paid_amount
+    return {
+        "id": receipt.id,
+        "products": [
+            {
+                "product_name": item.product_name,
+                "unit_price": item.unit_price,
+                "quantity": item.quantity,
+            }
+            for item in receipt.items
+        ],
+        "payment_type": receipt.payment_type.value,
+        "total": receipt.total_amount,
+        "paid_amount": paid_amount,
+        "rest": receipt.rest,
+        "created_at": receipt.created_at,
+    }
+
+
+def receipt_file_paths(receipt_id: UUID) -> Tuple[str, str]:
+    """
+    Build the deterministic paths of the text and QR code files of a receipt.
+
+    Only the text with ``DEFAULT_LINE_LENGTH`` is stored, so neither name depends on the line length.
+
+    :param receipt_id: The public identifier of the receipt.
+    :type receipt_id: UUID
+    :return: A tuple containing the text file path and the QR code file path.
+    :rtype: Tuple[str, str]
+    """
+    return f"{_TEXT_PATH_PREFIX}{receipt_id}.txt", f"{_QR_PATH_PREFIX}{receipt_id}.png"
 
 
-async def prepare_receipt_files(
-    db: AsyncSession,
-    receipt_id: UUID,
-    line_length: int
-) -> Tuple[str, str]:
+async def render_receipt_text(db: AsyncSession, receipt_id: UUID, line_length: int) -> str:
     """
-    Fetches a receipt by its public ID. If the corresponding text and QR code files do not exist,
-    they are generated, stored in the database, and then returned.
+    Render the text of a public receipt in memory, without storing it.
+
+    Used for line lengths other than ``DEFAULT_LINE_LENGTH``, so arbitrary widths never add
+    files to the disk.
 
     :param db: The asynchronous database session.
     :type db: AsyncSession
     :param receipt_id: The public identifier of the receipt.
     :type receipt_id: UUID
-    :param line_length: Number of characters per line when generating the text file.
+    :param line_length: Number of characters per line.
     :type line_length: int
-    :return: A tuple containing the text file path and the QR code file path.
-    :rtype: Tuple[str, str]
+    :return: The formatted receipt text.
+    :rtype: str
     :raises HTTPException: If the receipt does not exist.
-    :raises IOError: If generating or writing the files fails.
-    :raises Exception: For any unexpected error encountered while updating the database.
     """
     receipt = await fetch_receipt_by_id_public(db, receipt_id)
     if not receipt:
         raise HTTPException(status_code=404, detail=messages.RECEIPT_NOT_EXIST)
+    return generate_receipt_text(receipt, line_length)
 
-    # Generate receipt text
-    receipt_text = generate_receipt_text(receipt, line_length)
 
-    # Create directories if they don't exist
-    os.makedirs(TEXT_RECEIPT_DIR, exist_ok=True)
-    os.makedirs(QR_CODE_DIR, exist_ok=True)
+async def prepare_receipt_files(db: AsyncSession, receipt_id: UUID) -> Tuple[str, str]:
+    """
+    Returns the text and QR code files of a receipt, generating the missing ones first.
 
-    # Build file paths
-    text_filename = f"{receipt.id}.txt"
-    text_filepath = os.path.join(TEXT_RECEIPT_DIR, text_filename)
+    The text file is rendered with ``DEFAULT_LINE_LENGTH``. File names are deterministic, so
+    files that already exist are returned without touching the database. New files are written
+    to a temporary name and moved into place with ``os.replace``, so concurrent generators never
+    expose a partially written file. Rendering the QR code and all disk I/O run in worker threads,
+    off the event loop.
 
-    qr_filename = f"{receipt.id}.png"
-    qr_filepath = os.path.join(QR_CODE_DIR, qr_filename)
+    :param db: The asynchronous database session.
+    :type db: AsyncSession
+    :param receipt_id: The public identifier of the receipt.
+    :type receipt_id: UUID
+    :return: A tuple containing the text file path and the QR code file path.
+    :rtype: Tuple[str, str]
+    :raises HTTPException: If the receipt does not exist.
+    :raises IOError: If generating or writing the files fails.
+    """
+    text_filepath, qr_filepath = receipt_file_paths(receipt_id)
+    text_exists = os.path.isfile(text_filepath)
+    qr_exists = os.path.isfile(qr_filepath)
+    if text_exists and qr_exists:
+        return text_filepath, qr_filepath
+
+    if not text_exists:
+        receipt_text = await render_receipt_text(db, receipt_id, DEFAULT_LINE_LENGTH)
+        await asyncio.to_thread(
+            _write_atomically, TEXT_RECEIPT_DIR, text_filepath,
+            lambda tmp_path: _write_bytes(tmp_path, receipt_text.encode("utf-8")),
+        )
 
+    if not qr_exists:
+        # The QR code only depends on the receipt id
+        txt_url = PUBLIC_RECEIPT_URL.format(receipt_id=receipt_id)
+        await asyncio.to_thread(
+            _write_atomically, QR_CODE_DIR, qr_filepath, lambda tmp_path: generate_qr_code(txt_url, tmp_path)
+        )
+
+    return text_filepath, qr_filepath
+
+
+def _write_bytes(path: str, data: bytes) -> None:
+    # Straight to the file descriptor: no file object, no buffering layer, normally one write(2)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
     try:
-        # Create the text file
-        with open(text_filepath, "w", encoding="utf-8") as f:
-            f.write(receipt_text)
-    except IOError as io_err:
-        raise io_err
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
+def _write_atomically(directory: str, path: str, write: Callable[[str], None]) -> None:
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{uuid4().hex}.tmp"
     try:
-        # Create the QR code
-        txt_url = (
-            f"http://0.0.0.0:8000/receipt/public/{receipt_id}/download?file_type=txt&line_length=40"
-        )
-        generate_qr_code(txt_url, qr_filepath)
-    except Exception as gen_err:
-        # Cleanup partial text file if needed
-        if os.path.exists(text_filepath):
-            os.remove(text_filepath)
-        raise gen_err
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def enqueue_receipt_files(queue: "asyncio.Queue[UUID]", receipt_id: UUID) -> None:
+    """
+    Schedule the generation of a receipt's files with the default line length.
 
-    text_path = text_filepath
-    qr_path = qr_filepath
+    Never blocks the caller: if the queue is full the receipt is skipped and its files are
+    generated on the first public view instead.
 
-    return text_path, qr_path
+    :param queue: The queue consumed by ``receipt_files_worker``.
+    :type queue: asyncio.Queue[UUID]
+    :param receipt_id: The identifier of the newly created receipt.
+    :type receipt_id: UUID
+    """
+    try:
+        queue.put_nowait(receipt_id)
+    except asyncio.QueueFull:
+        logger.warning("Receipt files queue is full, %s will be generated on demand", receipt_id)
+
+
+async def receipt_files_worker(queue: "asyncio.Queue[UUID]") -> None:
+    """
+    Generate the files of queued receipts, one at a time, until cancelled.
+
+    Each receipt is loaded in its own session, independent of the request that created it.
+    Failures are only logged; the public endpoint generates missing files on demand.
+
+    :param queue: The queue filled by ``enqueue_receipt_files``. It is created in the application's
+                  lifespan, on the event loop the worker runs on.
+    :type queue: asyncio.Queue[UUID]
+    """
+    while True:
+        receipt_id = await queue.get()
+        try:
+            async with sessionmanager.session() as session:
+                await prepare_receipt_files(session, receipt_id)
+        except Exception as exc:
+            logger.warning("Pre-generating files of receipt %s failed: %s", receipt_id, exc)
+        finally:
+            queue.task_done()
@@ -1,4 +1,10 @@
 #!/bin/sh
 alembic upgrade head
 
-exec uvicorn app.main:app --host 0.0.0.0 --port 8000
+# uvloop and httptools ship with uvicorn[standard]; request them explicitly so a missing
+# extra fails loudly instead of silently falling back to asyncio/h11.
+exec uvicorn app.main:app --host 0.0.0.0 --port 8000 \
+    --loop uvloop \
+    --http httptools \
+    --workers "${WEB_CONCURRENCY:-$(nproc)}" \
+    --no-access-log
@@ -0,0 +1,31 @@
+"""receipt listing indexes
+
+Revision ID: 29c0f7ce6548
+Revises: b37988e9092c
+Create Date: 2026-10-16 10:52:43.905127
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '29c0f7ce6548'
+down_revision: Union[str, None] = 'b37988e9092c'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_receipts_user_created', 'receipts', ['user_id', sa.text('created_at DESC')], unique=False)
+    # The composite index above covers lookups by user_id alone
+    op.drop_index('ix_receipts_user_id', table_name='receipts')
+    op.create_index(op.f('ix_receipt_items_receipt_id'), 'receipt_items', ['receipt_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_receipt_items_receipt_id'), table_name='receipt_items')
+    op.create_index('ix_receipts_user_id', 'receipts', ['user_id'], unique=False)
+    op.drop_index('ix_receipts_user_created', table_name='receipts')
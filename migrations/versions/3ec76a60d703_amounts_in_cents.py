@@ -0,0 +1,42 @@
+"""amounts in cents
+
+Revision ID: 3ec76a60d703
+Revises: a0b8b657a1d3
+Create Date: 2026-10-16 10:05:52.671348
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3ec76a60d703'
+down_revision: Union[str, None] = 'a0b8b657a1d3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+AMOUNT_COLUMNS = (
+    ('receipts', 'total_amount', False),
+    ('receipts', 'paid_amount', True),
+    ('receipt_items', 'unit_price', False),
+)
+
+
+def upgrade() -> None:
+    for table, column, nullable in AMOUNT_COLUMNS:
+        op.alter_column(table, column,
+                   existing_type=sa.Numeric(precision=10, scale=2),
+                   type_=sa.BigInteger(),
+                   existing_nullable=nullable,
+                   postgresql_using=f'round({column} * 100)::bigint')
+
+
+def downgrade() -> None:
+    for table, column, nullable in AMOUNT_COLUMNS:
+        op.alter_column(table, column,
+                   existing_type=sa.BigInteger(),
+                   type_=sa.Numeric(precision=10, scale=2),
+                   existing_nullable=nullable,
+                   postgresql_using=f'({column} / 100.0)::numeric(10, 2)')
@@ -0,0 +1,31 @@
+"""receipts rest generated column
+
+Revision ID: 5e1f0c9a7b42
+Revises: 29c0f7ce6548
+Create Date: 2026-10-16 11:20:14.518306
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e1f0c9a7b42'
+down_revision: Union[str, None] = '29c0f7ce6548'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('receipts', sa.Column(
+        'rest',
+        sa.BigInteger(),
+        sa.Computed("CASE WHEN payment_type = 'card' THEN 0 ELSE paid_amount - total_amount END", persisted=True),
+        nullable=True,
+    ))
+
+
+def downgrade() -> None:
+    op.drop_column('receipts', 'rest')
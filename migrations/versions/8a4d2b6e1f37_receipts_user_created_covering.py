@@ -0,0 +1,31 @@
+"""receipts user created covering index
+
+Revision ID: 8a4d2b6e1f37
+Revises: 5e1f0c9a7b42
+Create Date: 2026-10-16 11:34:52.207731
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8a4d2b6e1f37'
+down_revision: Union[str, None] = '5e1f0c9a7b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_index('ix_receipts_user_created', table_name='receipts')
+    op.create_index(
+        'ix_receipts_user_created', 'receipts', ['user_id', sa.text('created_at DESC')], unique=False,
+        postgresql_include=['id', 'total_amount', 'paid_amount', 'payment_type', 'rest'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipts_user_created', table_name='receipts')
+    op.create_index('ix_receipts_user_created', 'receipts', ['user_id', sa.text('created_at DESC')], unique=False)
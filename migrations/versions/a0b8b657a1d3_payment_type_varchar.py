@@ -0,0 +1,39 @@
+"""payment type varchar
+
+Revision ID: a0b8b657a1d3
+Revises: dc72e7f4b6ad
+Create Date: 2026-10-16 09:41:27.530914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a0b8b657a1d3'
+down_revision: Union[str, None] = 'dc72e7f4b6ad'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('receipts', 'payment_type',
+               existing_type=postgresql.ENUM('cash', 'card', name='paymenttype'),
+               type_=sa.String(length=4),
+               existing_nullable=False,
+               postgresql_using='payment_type::text')
+    op.execute('DROP TYPE paymenttype')
+    op.create_check_constraint('ck_receipts_payment_type', 'receipts', "payment_type IN ('cash', 'card')")
+
+
+def downgrade() -> None:
+    op.drop_constraint('ck_receipts_payment_type', 'receipts', type_='check')
+    op.execute("CREATE TYPE paymenttype AS ENUM ('cash', 'card')")
+    op.alter_column('receipts', 'payment_type',
+               existing_type=sa.String(length=4),
+               type_=postgresql.ENUM('cash', 'card', name='paymenttype'),
+               existing_nullable=False,
+               postgresql_using='payment_type::paymenttype')
@@ -0,0 +1,30 @@
+"""receipts created_at server default
+
+Revision ID: c4f9e2a81d05
+Revises: 8a4d2b6e1f37
+Create Date: 2026-10-16 11:58:40.662190
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c4f9e2a81d05'
+down_revision: Union[str, None] = '8a4d2b6e1f37'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.alter_column('receipts', 'created_at',
+               existing_type=sa.DateTime(),
+               server_default=sa.text('now()'))
+
+
+def downgrade() -> None:
+    op.alter_column('receipts', 'created_at',
+               existing_type=sa.DateTime(),
+               server_default=None)
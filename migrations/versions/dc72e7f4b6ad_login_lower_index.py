@@ -0,0 +1,28 @@
+"""login lower index
+
+Revision ID: dc72e7f4b6ad
+Revises: cd0f6a1b56cf
+Create Date: 2026-10-16 09:12:04.118203
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'dc72e7f4b6ad'
+down_revision: Union[str, None] = 'cd0f6a1b56cf'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_users_login_lower', 'users', [sa.text('lower(login)')], unique=True)
+    op.drop_constraint('users_login_key', 'users', type_='unique')
+
+
+def downgrade() -> None:
+    op.create_unique_constraint('users_login_key', 'users', ['login'])
+    op.drop_index('ix_users_login_lower', table_name='users')
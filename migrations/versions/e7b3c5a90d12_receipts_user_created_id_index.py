@@ -0,0 +1,36 @@
+"""receipts user created id index
+
+Revision ID: e7b3c5a90d12
+Revises: c4f9e2a81d05
+Create Date: 2026-10-16 12:21:07.483916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7b3c5a90d12'
+down_revision: Union[str, None] = 'c4f9e2a81d05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # id is a key column now, so the (created_at, id) keyset order is read from the index as is
+    op.drop_index('ix_receipts_user_created', table_name='receipts')
+    op.create_index(
+        'ix_receipts_user_created', 'receipts',
+        ['user_id', sa.text('created_at DESC'), sa.text('id DESC')], unique=False,
+        postgresql_include=['total_amount', 'paid_amount', 'payment_type', 'rest'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_receipts_user_created', table_name='receipts')
+    op.create_index(
+        'ix_receipts_user_created', 'receipts', ['user_id', sa.text('created_at DESC')], unique=False,
+        postgresql_include=['id', 'total_amount', 'paid_amount', 'payment_type', 'rest'],
+    )
@@ -1,5 +1,7 @@
 import pytest
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, patch
+
+import orjson
 
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
@@ -14,6 +16,38 @@ engine = create_async_engine(TEST_SQLALCHEMY_DATABASE_URL, echo=False)
 async_session = async_sessionmaker(bind=engine, expire_on_commit=False)
 
 
+class InMemoryCache:
+    """
+    A dict-backed stand-in for ``RedisCache`` that keeps its JSON round trip.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    async def get(self, key):
+        raw = self.data.get(key)
+        return None if raw is None else orjson.loads(raw)
+
+    async def set(self, key, value, ex):
+        self.data[key] = orjson.dumps(value, default=str)
+
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+    async def incr(self, key):
+        self.data[key] = orjson.dumps(orjson.loads(self.data.get(key, b"0")) + 1)
+
+
+@pytest.fixture
+def memory_cache():
+    """
+    Replace the shared Redis cache with an in-memory one, so tests never depend on a live Redis.
+    """
+    cache = InMemoryCache()
+    with patch("app.service.cache.cache", cache), patch("app.router.receipts.cache", cache):
+        yield cache
+
+
 @pytest.fixture(autouse=True)
 def mock_fastapi_limiter_init():
     original_init = fastapi_limiter.FastAPILimiter.init
@@ -1,3 +1,17 @@
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+from uuid import uuid4
+
+import orjson
+import pytest
+from jose import JWTError, jwt
+from redis.exceptions import ConnectionError as RedisConnectionError
+
+from app.persistence.models import User
+from app.service.auth import USER_CACHE_TTL, _decode_hs256, _user_from_cache, _user_to_cache, auth_service
+from app.service.cache import RedisCache
+
+
 def test_signup_successful(client):
     user_data = {
         "name": "TestUser",
@@ -48,3 +62,84 @@ def test_refresh_token_successful(client):
     assert "access_token" in new_token_data
     assert "refresh_token" in new_token_data
     assert new_token_data["token_type"] == "bearer"
+
+
+async def test_get_current_user_without_redis():
+    token = await auth_service.create_access_token(data={"sub": "cachelogin"})
+    user = User(id=uuid4(), name="Cache", login="cachelogin", password="hash")
+    failing_cache = RedisCache(MagicMock())
+    failing_cache._redis = AsyncMock()
+    failing_cache._redis.get.side_effect = RedisConnectionError("down")
+    failing_cache._redis.set.side_effect = RedisConnectionError("down")
+
+    with patch.object(auth_service, "cache", failing_cache), \
+        patch("app.service.auth.get_user_by_login", AsyncMock(return_value=user)) as mock_get_user:
+        result = await auth_service.get_current_user(token=token, db=None)
+
+    assert result is user
+    mock_get_user.assert_awaited_once_with("cachelogin", None)
+
+
+async def test_get_current_user_cache_ttl_bounded_by_token():
+    token = await auth_service.create_access_token(data={"sub": "cachelogin"}, expires_delta=10)
+    user = User(id=uuid4(), name="Cache", login="cachelogin", password="hash")
+    cache = AsyncMock()
+    cache.get.return_value = None
+
+    with patch.object(auth_service, "cache", cache), \
+        patch("app.service.auth.get_user_by_login", AsyncMock(return_value=user)):
+        await auth_service.get_current_user(token=token, db=None)
+
+    ttl = cache.set.call_args.kwargs["ex"]
+    assert 1 <= ttl <= 10 < USER_CACHE_TTL
+
+
+def test_user_cache_round_trip_skips_secrets():
+    user = User(id=uuid4(), name="Cache", login="cachelogin", password="hash", refresh_token="token")
+
+    payload = orjson.dumps(_user_to_cache(user))
+    cached = _user_from_cache(orjson.loads(payload))
+
+    assert b"hash" not in payload and b"token" not in payload
+    assert (cached.id, cached.name, cached.login) == (user.id, user.name, user.login)
+
+
+async def test_access_token_payload_decoded_once():
+    login = f"decode-{uuid4()}"
+    token = await auth_service.create_access_token(data={"sub": login})
+
+    with patch("app.service.auth._decode_hs256", wraps=_decode_hs256) as mock_decode:
+        first = auth_service._decode_access_token(token)
+        second = auth_service._decode_access_token(token)
+
+    assert first == second
+    assert first["sub"] == login
+    mock_decode.assert_called_once()
+
+
+async def test_hs256_fast_path_matches_jose():
+    token = await auth_service.create_access_token(data={"sub": "fastpath"})
+    key = auth_service.SECRET_KEY.encode()
+
+    assert _decode_hs256(token, key) == jwt.decode(token, auth_service.SECRET_KEY, algorithms=["HS256"])
+    assert _decode_hs256(token, b"another key") is None
+    header, payload, signature = token.split(".")
+    assert _decode_hs256(f"{header}.{payload}x.{signature}", key) is None
+
+
+def test_hs256_fast_path_defers_tokens_with_audience():
+    payload = {"sub": "fastpath", "aud": "someone", "exp": int(time.time()) + 60}
+    token = jwt.encode(payload, auth_service.SECRET_KEY, algorithm="HS256")
+
+    assert _decode_hs256(token, auth_service.SECRET_KEY.encode()) is None
+    with pytest.raises(JWTError):
+        auth_service._decode_access_token(token)
+
+
+def test_hs256_fast_path_defers_non_numeric_iat():
+    payload = {"sub": "fastpath", "iat": "yesterday", "exp": int(time.time()) + 60}
+    token = jwt.encode(payload, auth_service.SECRET_KEY, algorithm="HS256")
+
+    assert _decode_hs256(token, auth_service.SECRET_KEY.encode()) is None
+    with pytest.raises(JWTError):
+        auth_service._decode_access_token(token)
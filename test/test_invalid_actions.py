@@ -1,6 +1,6 @@
 from decimal import Decimal
 from uuid import uuid4
-from unittest.mock import AsyncMock, patch
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 from fastapi import HTTPException
@@ -77,8 +77,15 @@ def test_download_receipt_file_invalid_file_type():
     assert "detail" in data
 
 
+def test_download_receipt_file_line_length_too_long():
+    receipt_id = str(uuid4())
+    params = {"file_type": "txt", "line_length": 10_000}
+    response = client.get(f"/receipt/public/{receipt_id}/view", params=params)
+    assert response.status_code == 422, response.text
+
+
 def test_download_receipt_file_not_found(monkeypatch):
-    async def fake_prepare_receipt_files(db, receipt_id, line_length):
+    async def fake_prepare_receipt_files(db, receipt_id):
         return "nonexistent.txt", "nonexistent_qr.png"
 
     monkeypatch.setattr(prepare_receipt_files, "__call__", fake_prepare_receipt_files)
@@ -97,7 +104,7 @@ async def test_public_receipt_file_not_found():
     mock_db = AsyncMock(spec=AsyncSession)
 
     with patch('app.router.receipts.prepare_receipt_files') as mock_prepare_files, \
-        patch('os.path.isfile', return_value=False):
+        patch('app.router.receipts._regular_file_stat', return_value=None):
         mock_prepare_files.return_value = ('/path/to/text.txt', '/path/to/qr.png')
 
         with pytest.raises(HTTPException) as exc_info:
@@ -144,6 +151,7 @@ async def test_create_receipt_insufficient_cash():
     with pytest.raises(HTTPException) as exc_info:
         await create_receipt(
             receipt_request,
+            request=MagicMock(),
             current_user=mock_user,
             db=mock_db
         )
@@ -163,8 +171,8 @@ async def test_create_receipt_invalid_payment_type():
 
     error = exc_info.value
     assert len(error.errors()) == 1
-    assert error.errors()[0]['type'] == 'value_error'
-    assert 'Invalid payment type' in error.errors()[0]['msg']
+    assert error.errors()[0]['type'] == 'literal_error'
+    assert error.errors()[0]['loc'] == ('type',)
 
 
 @pytest.mark.asyncio
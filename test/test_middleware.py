@@ -0,0 +1,96 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.service.middleware import FastCORSMiddleware
+
+cors_app = FastAPI()
+cors_app.add_middleware(FastCORSMiddleware)
+
+
+@cors_app.get("/ping")
+def ping():
+    return {"ping": "pong"}
+
+
+cors_client = TestClient(cors_app)
+
+strict_app = FastAPI()
+strict_app.add_middleware(
+    FastCORSMiddleware,
+    allow_origins=["https://example.com"],
+    allow_credentials=True,
+    max_age=86400,
+)
+strict_app.add_api_route("/ping", ping)
+
+strict_client = TestClient(strict_app)
+
+
+def test_cors_header_added_to_response():
+    response = cors_client.get("/ping", headers={"Origin": "http://example.com"})
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert response.json() == {"ping": "pong"}
+
+
+def test_cors_preflight_short_circuit():
+    response = cors_client.options(
+        "/ping",
+        headers={
+            "Origin": "http://example.com",
+            "Access-Control-Request-Method": "GET",
+        },
+    )
+    assert response.status_code == 204
+    assert response.headers["access-control-allow-origin"] == "*"
+    assert "GET" in response.headers["access-control-allow-methods"]
+    assert response.content == b""
+
+
+def test_cors_explicit_origin_allowed():
+    response = strict_client.get("/ping", headers={"Origin": "https://example.com"})
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "https://example.com"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert response.headers["vary"] == "Origin"
+
+
+def test_cors_explicit_origin_rejected():
+    response = strict_client.get("/ping", headers={"Origin": "https://evil.com"})
+    assert response.status_code == 200
+    assert "access-control-allow-origin" not in response.headers
+
+    preflight = strict_client.options(
+        "/ping",
+        headers={
+            "Origin": "https://evil.com",
+            "Access-Control-Request-Method": "GET",
+        },
+    )
+    assert preflight.status_code == 400
+
+
+def test_cors_explicit_origin_preflight_max_age():
+    response = strict_client.options(
+        "/ping",
+        headers={
+            "Origin": "https://example.com",
+            "Access-Control-Request-Method": "GET",
+        },
+    )
+    assert response.status_code == 204
+    assert response.headers["access-control-max-age"] == "86400"
+
+
+def test_cors_preflight_echoes_requested_headers():
+    response = strict_client.options(
+        "/ping",
+        headers={
+            "Origin": "https://example.com",
+            "Access-Control-Request-Method": "GET",
+            "Access-Control-Request-Headers": "authorization",
+        },
+    )
+    assert response.status_code == 204
+    assert response.headers["access-control-allow-headers"] == "authorization"
+    assert response.headers["access-control-allow-credentials"] == "true"
@@ -0,0 +1,21 @@
+import time
+from decimal import Decimal
+
+from app.persistence.models import uuid7, to_cents, from_cents
+
+
+def test_uuid7_version_and_ordering():
+    first = uuid7()
+    time.sleep(0.002)
+    second = uuid7()
+
+    assert first.version == 7
+    assert second.version == 7
+    assert first < second
+
+
+def test_cents_round_trip():
+    assert to_cents(Decimal("35.50")) == 3550
+    assert to_cents(Decimal("0.005")) == 1
+    assert from_cents(3550) == Decimal("35.50")
+    assert str(from_cents(0)) == "0.00"
@@ -1,10 +1,20 @@
+import asyncio
 import os
+import stat
+import struct
+import zlib
 import pytest
 from uuid import uuid4
 from unittest.mock import AsyncMock, patch
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.router.receipts import public_receipt
+from app.router.receipts import PUBLIC_FILE_CACHE_CONTROL, public_receipt
+from app.service.utils import encode_png_bitmap, enqueue_receipt_files, receipt_file_paths, receipt_files_worker
+
+FILE_STAT = os.stat_result(
+    (stat.S_IFREG | 0o644, 0, 0, 1, 0, 0, 42, 0, 0, 0), {"st_mtime_ns": 1_700_000_000_000_000_000}
+)
+FILE_ETAG = f'W/"{FILE_STAT.st_mtime_ns:x}-{FILE_STAT.st_size:x}"'
 
 
 @pytest.mark.asyncio
@@ -14,21 +24,28 @@ async def test_public_receipt_txt_file_success():
 
     with patch('app.router.receipts.prepare_receipt_files') as mock_prepare_files, \
         patch('app.router.receipts.FileResponse') as mock_file_response, \
-        patch('os.path.isfile', return_value=True):
+        patch('app.router.receipts._regular_file_stat', return_value=FILE_STAT):
         mock_prepare_files.return_value = ('/path/to/text.txt', '/path/to/qr.png')
 
         response = await public_receipt(
             receipt_id=mock_receipt_id,
             file_type='txt',
             line_length=40,
-            db=mock_db
+            db=mock_db,
+            if_none_match=None
         )
 
-        mock_prepare_files.assert_called_once_with(mock_db, mock_receipt_id, 40)
+        text_path, _ = receipt_file_paths(mock_receipt_id)
+        mock_prepare_files.assert_not_called()
         mock_file_response.assert_called_once_with(
-            path='/path/to/text.txt',
+            path=text_path,
             media_type='text/plain',
-            headers={'Content-Disposition': f'inline; filename={os.path.basename("/path/to/text.txt")}'}
+            headers={
+                'Content-Disposition': f'inline; filename={os.path.basename(text_path)}',
+                'ETag': FILE_ETAG,
+                'Cache-Control': PUBLIC_FILE_CACHE_CONTROL,
+            },
+            stat_result=FILE_STAT
         )
 
 
@@ -39,19 +56,146 @@ async def test_public_receipt_qr_file_success():
 
     with patch('app.router.receipts.prepare_receipt_files') as mock_prepare_files, \
         patch('app.router.receipts.FileResponse') as mock_file_response, \
-        patch('os.path.isfile', return_value=True):
+        patch('app.router.receipts._regular_file_stat', return_value=FILE_STAT):
         mock_prepare_files.return_value = ('/path/to/text.txt', '/path/to/qr.png')
 
         response = await public_receipt(
             receipt_id=mock_receipt_id,
             file_type='qr',
             line_length=40,
-            db=mock_db
+            db=mock_db,
+            if_none_match=None
         )
 
-        mock_prepare_files.assert_called_once_with(mock_db, mock_receipt_id, 40)
+        _, qr_path = receipt_file_paths(mock_receipt_id)
+        mock_prepare_files.assert_not_called()
         mock_file_response.assert_called_once_with(
-            path='/path/to/qr.png',
+            path=qr_path,
             media_type='image/png',
-            headers={'Content-Disposition': f'inline; filename={os.path.basename("/path/to/qr.png")}'}
+            headers={
+                'Content-Disposition': f'inline; filename={os.path.basename(qr_path)}',
+                'ETag': FILE_ETAG,
+                'Cache-Control': PUBLIC_FILE_CACHE_CONTROL,
+            },
+            stat_result=FILE_STAT
+        )
+
+
+@pytest.mark.asyncio
+async def test_public_receipt_not_modified():
+    mock_receipt_id = uuid4()
+    mock_db = AsyncMock(spec=AsyncSession)
+
+    with patch('app.router.receipts.prepare_receipt_files') as mock_prepare_files, \
+        patch('app.router.receipts.FileResponse') as mock_file_response, \
+        patch('app.router.receipts._regular_file_stat', return_value=FILE_STAT):
+        mock_prepare_files.return_value = ('/path/to/text.txt', '/path/to/qr.png')
+
+        response = await public_receipt(
+            receipt_id=mock_receipt_id,
+            file_type='txt',
+            line_length=40,
+            db=mock_db,
+            if_none_match=FILE_ETAG
+        )
+
+        assert response.status_code == 304
+        assert response.headers['etag'] == FILE_ETAG
+        assert response.headers['cache-control'] == PUBLIC_FILE_CACHE_CONTROL
+        mock_file_response.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_public_receipt_generates_missing_files():
+    mock_receipt_id = uuid4()
+    mock_db = AsyncMock(spec=AsyncSession)
+
+    with patch('app.router.receipts.prepare_receipt_files') as mock_prepare_files, \
+        patch('app.router.receipts.FileResponse') as mock_file_response, \
+        patch('app.router.receipts._regular_file_stat', side_effect=[None, FILE_STAT]):
+        mock_prepare_files.return_value = ('/path/to/text.txt', '/path/to/qr.png')
+
+        response = await public_receipt(
+            receipt_id=mock_receipt_id,
+            file_type='txt',
+            line_length=40,
+            db=mock_db,
+            if_none_match=None
         )
+
+        assert response is mock_file_response.return_value
+        mock_prepare_files.assert_called_once_with(mock_db, mock_receipt_id)
+        mock_file_response.assert_called_once_with(
+            path='/path/to/text.txt',
+            media_type='text/plain',
+            headers={
+                'Content-Disposition': f'inline; filename={os.path.basename("/path/to/text.txt")}',
+                'ETag': FILE_ETAG,
+                'Cache-Control': PUBLIC_FILE_CACHE_CONTROL,
+            },
+            stat_result=FILE_STAT
+        )
+
+
+@pytest.mark.asyncio
+async def test_public_receipt_other_line_length_rendered_in_memory():
+    mock_receipt_id = uuid4()
+    mock_db = AsyncMock(spec=AsyncSession)
+
+    with patch('app.router.receipts.prepare_receipt_files') as mock_prepare_files, \
+        patch('app.router.receipts.render_receipt_text', return_value="receipt text") as mock_render:
+        response = await public_receipt(
+            receipt_id=mock_receipt_id,
+            file_type='txt',
+            line_length=32,
+            db=mock_db,
+            if_none_match=None
+        )
+
+        mock_render.assert_awaited_once_with(mock_db, mock_receipt_id, 32)
+        mock_prepare_files.assert_not_called()
+        assert response.body == b"receipt text"
+        assert response.headers['cache-control'] == PUBLIC_FILE_CACHE_CONTROL
+
+        not_modified = await public_receipt(
+            receipt_id=mock_receipt_id,
+            file_type='txt',
+            line_length=32,
+            db=mock_db,
+            if_none_match=response.headers['etag']
+        )
+
+        assert not_modified.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_receipt_files_worker_generates_queued_receipts():
+    receipt_id = uuid4()
+    queue = asyncio.Queue(maxsize=1)
+
+    with patch('app.service.utils.sessionmanager') as mock_sessionmanager, \
+        patch('app.service.utils.prepare_receipt_files') as mock_prepare_files:
+        enqueue_receipt_files(queue, receipt_id)
+        # A full queue drops the receipt instead of blocking the request
+        enqueue_receipt_files(queue, uuid4())
+
+        worker = asyncio.create_task(receipt_files_worker(queue))
+        await asyncio.wait_for(queue.join(), timeout=1)
+        worker.cancel()
+
+    session = mock_sessionmanager.session.return_value.__aenter__.return_value
+    mock_prepare_files.assert_awaited_once_with(session, receipt_id)
+
+
+def test_encode_png_bitmap():
+    png = encode_png_bitmap([[True, False], [False, True]], scale=2)
+
+    assert png.startswith(b"\x89PNG\r\n\x1a\n")
+    width, height, bit_depth, color_type = struct.unpack(">IIBB", png[16:26])
+    assert (width, height, bit_depth, color_type) == (4, 4, 1, 0)
+
+    idat_length, = struct.unpack(">I", png[33:37])
+    assert png[37:41] == b"IDAT"
+    raw = zlib.decompress(png[41:41 + idat_length])
+    # Filter byte + one packed byte per scanline; dark modules are 0 bits, padding is light
+    assert raw == b"\x00\x3f" * 2 + b"\x00\xcf" * 2
@@ -1,15 +1,18 @@
 import pytest
 from decimal import Decimal
-from unittest.mock import AsyncMock, patch
-from sqlalchemy.ext.asyncio import AsyncSession
+from unittest.mock import AsyncMock, MagicMock, patch
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 from uuid import UUID, uuid4
 
+from app.persistence.models import Base, User
+from app.persistence.repository.receipts import create_receipt_in_db
 from app.service.schemas import ReceiptCreateSchema, ProductItem, PaymentData
-from app.router.receipts import create_receipt
+from app.router.receipts import create_receipt, list_receipts
 
 
 @pytest.mark.asyncio
-async def test_create_receipt_cash_payment_success():
+async def test_create_receipt_cash_payment_success(memory_cache):
     receipt_request = ReceiptCreateSchema(
         products=[
             ProductItem(name="Item1", price=Decimal("10.00"), quantity=2),
@@ -20,6 +23,7 @@ async def test_create_receipt_cash_payment_success():
 
     mock_user = AsyncMock(id=1)
     mock_db = AsyncMock(spec=AsyncSession)
+    mock_request = MagicMock()
 
     with patch('app.router.receipts.create_receipt_in_db') as mock_create_receipt:
         mock_receipt = AsyncMock(
@@ -31,6 +35,7 @@ async def test_create_receipt_cash_payment_success():
 
         response = await create_receipt(
             receipt_request,
+            request=mock_request,
             current_user=mock_user,
             db=mock_db
         )
@@ -40,10 +45,11 @@ async def test_create_receipt_cash_payment_success():
         assert response.rest == Decimal("0.00")
         assert len(response.products) == 2
         assert response.payment.type == "cash"
+        mock_request.app.state.receipt_files_queue.put_nowait.assert_called_once_with(mock_receipt.id)
 
 
 @pytest.mark.asyncio
-async def test_create_receipt_card_payment():
+async def test_create_receipt_card_payment(memory_cache):
     receipt_request = ReceiptCreateSchema(
         products=[
             ProductItem(name="Item1", price=Decimal("25.00"), quantity=1)
@@ -53,6 +59,7 @@ async def test_create_receipt_card_payment():
 
     mock_user = AsyncMock(id=1)
     mock_db = AsyncMock(spec=AsyncSession)
+    mock_request = MagicMock()
 
     with patch('app.router.receipts.create_receipt_in_db') as mock_create_receipt:
         mock_receipt = AsyncMock(
@@ -64,6 +71,7 @@ async def test_create_receipt_card_payment():
 
         response = await create_receipt(
             receipt_request,
+            request=mock_request,
             current_user=mock_user,
             db=mock_db
         )
@@ -86,3 +94,61 @@ def test_payment_data_validation():
 
     with pytest.raises(ValueError):
         PaymentData(type="cash")
+
+
+@pytest.mark.asyncio
+async def test_create_receipt_caches_rounded_amounts():
+    """
+    Test that the receipt cached on creation holds the amounts rounded to cents, as stored.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    receipt_request = ReceiptCreateSchema(
+        products=[ProductItem(name="Item1", price=Decimal("1.005"), quantity=1)],
+        payment=PaymentData(type="cash", amount=Decimal("2.005"))
+    )
+
+    async with async_sessionmaker(bind=engine, expire_on_commit=False)() as db:
+        user = User(name="Rounding", login="rounding@example.com", password="secret")
+        db.add(user)
+        await db.flush()
+
+        with patch('app.persistence.repository.receipts.cache') as mock_cache:
+            mock_cache.set = AsyncMock()
+            await create_receipt_in_db(receipt_request, user, Decimal("1.005"), db)
+
+    await engine.dispose()
+
+    payload = mock_cache.set.call_args.args[1]
+    assert payload["total_amount"] == Decimal("1.01")
+    assert payload["paid_amount"] == Decimal("2.01")
+    assert payload["items"] == [("Item1", Decimal("1.01"), 1)]
+
+
+@pytest.mark.asyncio
+async def test_create_receipt_invalidates_user_listings(memory_cache):
+    mock_user = AsyncMock(id=uuid4())
+    mock_db = AsyncMock(spec=AsyncSession)
+    receipt_request = ReceiptCreateSchema(
+        products=[ProductItem(name="Item1", price=Decimal("25.00"), quantity=1)],
+        payment=PaymentData(type="card")
+    )
+    listing = dict(
+        current_user=mock_user, db=mock_db, start_date=None, end_date=None,
+        min_total=None, payment_type=None, limit=10, cursor=None
+    )
+
+    with patch('app.router.receipts.fetch_receipts', return_value=[]) as mock_fetch_receipts, \
+        patch('app.router.receipts.create_receipt_in_db') as mock_create_receipt:
+        mock_create_receipt.return_value = AsyncMock(id=uuid4(), created_at="2024-03-04T12:00:00")
+
+        await list_receipts(**listing)
+        await list_receipts(**listing)
+        assert mock_fetch_receipts.call_count == 1
+
+        await create_receipt(receipt_request, request=MagicMock(), current_user=mock_user, db=mock_db)
+        await list_receipts(**listing)
+
+    assert mock_fetch_receipts.call_count == 2
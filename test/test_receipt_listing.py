@@ -1,13 +1,21 @@
+import asyncio
 import pytest
 from datetime import datetime, timedelta
 from decimal import Decimal
 from uuid import uuid4
 from unittest.mock import AsyncMock, patch
-from sqlalchemy.ext.asyncio import AsyncSession
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
 
 from app.service.schemas import ReceiptResponseOut
-from app.persistence.models import Receipt, PaymentType
+from app.persistence.models import Base, User, Receipt, ReceiptItem, PaymentType
+from app.persistence.repository.receipts import fetch_receipts
 from app.router.receipts import list_receipts, get_receipt
+from app.service.utils import NEXT_CURSOR_HEADER, build_receipt_response_out, decode_cursor, encode_cursor
 
 
 @pytest.fixture
@@ -37,7 +45,7 @@ def mock_receipts():
 
 
 @pytest.mark.asyncio
-async def test_list_receipts_default_parameters():
+async def test_list_receipts_default_parameters(memory_cache):
     mock_user = AsyncMock(id=1)
     mock_db = AsyncMock(spec=AsyncSession)
 
@@ -72,7 +80,7 @@ async def test_list_receipts_default_parameters():
                 paid_amount=receipt.paid_amount,
                 rest=Decimal("0.00"),
                 created_at=receipt.created_at
-            ) for receipt in mock_receipts_data
+            ).model_dump() for receipt in mock_receipts_data
         ]
         mock_build_response.side_effect = mock_responses
 
@@ -84,11 +92,14 @@ async def test_list_receipts_default_parameters():
             min_total=None,
             payment_type=None,
             limit=10,
-            offset=0
+            cursor=None
         )
 
-        assert len(results) == 2
-        assert all(isinstance(receipt, ReceiptResponseOut) for receipt in results)
+        body = orjson.loads(results.body)
+        assert len(body) == 2
+        assert [ReceiptResponseOut.model_validate(receipt).id for receipt in body] == [
+            receipt.id for receipt in mock_receipts_data
+        ]
         mock_fetch_receipts.assert_called_once_with(
             db=mock_db,
             user_id=1,
@@ -97,12 +108,12 @@ async def test_list_receipts_default_parameters():
             min_total=None,
             payment_type=None,
             limit=10,
-            offset=0
+            after=None
         )
 
 
 @pytest.mark.asyncio
-async def test_list_receipts_with_filters():
+async def test_list_receipts_with_filters(memory_cache):
     start_date = datetime.now() - timedelta(days=7)
     end_date = datetime.now()
 
@@ -132,7 +143,7 @@ async def test_list_receipts_with_filters():
                 paid_amount=receipt.paid_amount,
                 rest=Decimal("0.00"),
                 created_at=receipt.created_at
-            ) for receipt in mock_filtered_receipts
+            ).model_dump() for receipt in mock_filtered_receipts
         ]
         mock_build_response.side_effect = mock_responses
 
@@ -142,12 +153,12 @@ async def test_list_receipts_with_filters():
             min_total=Decimal("50.00"),
             payment_type="cash",
             limit=5,
-            offset=0,
+            cursor=None,
             current_user=mock_user,
             db=mock_db
         )
 
-        assert len(results) == 1
+        assert len(orjson.loads(results.body)) == 1
         mock_fetch_receipts.assert_called_once_with(
             db=mock_db,
             user_id=1,
@@ -156,7 +167,7 @@ async def test_list_receipts_with_filters():
             min_total=Decimal("50.00"),
             payment_type="cash",
             limit=5,
-            offset=0
+            after=None
         )
 
 
@@ -167,10 +178,14 @@ async def test_get_receipt_by_id_success():
     mock_db = AsyncMock(spec=AsyncSession)
 
     with patch('app.router.receipts.fetch_receipt_by_id') as mock_fetch_receipt:
-        mock_receipt = AsyncMock(
+        mock_receipt = Receipt(
             id=receipt_id,
+            payment_type=PaymentType.card,
             total_amount=Decimal("50.00"),
-            payment_type=PaymentType.card
+            paid_amount=Decimal("50.00"),
+            rest=Decimal("0.00"),
+            created_at=datetime.now(),
+            items=[],
         )
         mock_fetch_receipt.return_value = mock_receipt
 
@@ -180,10 +195,162 @@ async def test_get_receipt_by_id_success():
             db=mock_db
         )
 
-        assert isinstance(result, ReceiptResponseOut)
-        assert result.id == receipt_id
+        assert result.status_code == 200
+        assert orjson.loads(result.body)["id"] == str(receipt_id)
         mock_fetch_receipt.assert_called_once_with(
             db=mock_db,
             user_id=1,
             receipt_id=receipt_id
         )
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 3, 1, 12, 30, 15, 123456)
+    receipt_id = uuid4()
+
+    cursor = encode_cursor(created_at, receipt_id)
+
+    assert decode_cursor(cursor) == (created_at, receipt_id)
+
+
+def test_invalid_cursor_rejected():
+    with pytest.raises(HTTPException) as exc_info:
+        decode_cursor("not-a-cursor")
+    assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_fetch_receipts_loads_items_in_two_queries():
+    """
+    Test that a page of receipts and all of their items are loaded with exactly two SELECTs.
+    """
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    async with async_sessionmaker(bind=engine)() as db:
+        user = User(name="Listing", login="listing@example.com", password="secret")
+        db.add(user)
+        await db.flush()
+        # Committing expires the user, so its id is read beforehand
+        user_id = user.id
+        for index in range(3):
+            db.add(Receipt(
+                user_id=user_id,
+                payment_type=PaymentType.cash,
+                total_amount=Decimal("10.00"),
+                paid_amount=Decimal("20.00"),
+                items=[ReceiptItem(product_name=f"Item{index}", unit_price=Decimal("5.00"), quantity=2)],
+            ))
+        await db.commit()
+        db.expunge_all()
+
+        event.listen(engine.sync_engine, "before_cursor_execute", record)
+        try:
+            receipts = await fetch_receipts(db=db, user_id=user_id, limit=10)
+            products = [build_receipt_response_out(receipt)["products"] for receipt in receipts]
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", record)
+
+    await engine.dispose()
+
+    assert len(receipts) == 3
+    assert all(len(items) == 1 for items in products)
+    assert sum(statement.lstrip().upper().startswith("SELECT") for statement in statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_list_receipts_large_page_rendered_in_thread(memory_cache):
+    mock_user = AsyncMock(id=uuid4())
+    mock_db = AsyncMock(spec=AsyncSession)
+    now = datetime.now()
+    receipts = [
+        Receipt(
+            id=uuid4(),
+            payment_type=PaymentType.cash,
+            total_amount=Decimal("10.00"),
+            paid_amount=Decimal("15.00"),
+            rest=Decimal("5.00"),
+            created_at=now - timedelta(minutes=index),
+            items=[],
+        )
+        for index in range(60)
+    ]
+
+    with patch('app.router.receipts.fetch_receipts', return_value=receipts), \
+        patch('app.router.receipts.asyncio.to_thread', wraps=asyncio.to_thread) as mock_to_thread:
+        results = await list_receipts(
+            current_user=mock_user,
+            db=mock_db,
+            start_date=None,
+            end_date=None,
+            min_total=None,
+            payment_type=None,
+            limit=100,
+            cursor=None
+        )
+
+    body = orjson.loads(results.body)
+    assert [receipt["id"] for receipt in body] == [str(receipt.id) for receipt in receipts]
+    assert body[0]["rest"] == "5.00"
+    mock_to_thread.assert_called_once()
+
+
+def _listing_receipts(count):
+    now = datetime.now()
+    return [
+        Receipt(
+            id=uuid4(),
+            payment_type=PaymentType.card,
+            total_amount=Decimal("10.00"),
+            paid_amount=None,
+            rest=Decimal("0.00"),
+            created_at=now - timedelta(minutes=index),
+            items=[],
+        )
+        for index in range(count)
+    ]
+
+
+async def _list_page(user, limit=10, cursor=None):
+    return await list_receipts(
+        current_user=user,
+        db=AsyncMock(spec=AsyncSession),
+        start_date=None,
+        end_date=None,
+        min_total=None,
+        payment_type=None,
+        limit=limit,
+        cursor=cursor
+    )
+
+
+@pytest.mark.asyncio
+async def test_list_receipts_cache_hit_skips_endpoint(memory_cache):
+    mock_user = AsyncMock(id=uuid4())
+
+    with patch('app.router.receipts.fetch_receipts', return_value=_listing_receipts(2)) as mock_fetch_receipts:
+        first = await _list_page(mock_user)
+        second = await _list_page(mock_user)
+
+    mock_fetch_receipts.assert_called_once()
+    assert second.body == first.body
+
+
+@pytest.mark.asyncio
+async def test_list_receipts_cache_replays_next_cursor(memory_cache):
+    mock_user = AsyncMock(id=uuid4())
+    receipts = _listing_receipts(2)
+
+    with patch('app.router.receipts.fetch_receipts', return_value=receipts) as mock_fetch_receipts:
+        first = await _list_page(mock_user, limit=2)
+        second = await _list_page(mock_user, limit=2)
+
+    mock_fetch_receipts.assert_called_once()
+    assert first.headers[NEXT_CURSOR_HEADER] == encode_cursor(receipts[-1].created_at, receipts[-1].id)
+    assert second.headers[NEXT_CURSOR_HEADER] == first.headers[NEXT_CURSOR_HEADER]